@@ -482,6 +482,13 @@ class Document(Base):
         Index('ix_document_embedded', 'tenant_id', 'embedded_at'),  # For embedding status
         Index('ix_document_confidence', 'classification_confidence'),  # For sorting
         Index('ix_document_created', 'tenant_id', 'created_at'),  # For date-based queries
+        # For gap analysis: newest work documents per tenant
+        Index(
+            'ix_document_tenant_status_date',
+            'tenant_id', 'status', 'classification', source_created_at.desc(),
+            postgresql_where=(is_deleted == False),
+            sqlite_where=(is_deleted == False)
+        ),
     )
 
     def __repr__(self):
@@ -1026,6 +1033,37 @@ class DeletedDocument(Base):
         return f"<DeletedDocument {self.external_id[:20]}>"
 
 
+# ============================================================================
+# GAP ANALYSIS CACHE
+# ============================================================================
+
+class GapAnalysisCache(Base):
+    """
+    Last gap analysis result per tenant, analysis mode and project.
+    Lets a rerun over unchanged documents reuse the gaps it already created.
+    """
+    __tablename__ = "gap_analysis_cache"
+
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    tenant_id = Column(String(36), ForeignKey("tenants.id"), nullable=False)
+
+    # Cache key
+    mode = Column(String(20), nullable=False)  # simple, multistage, goalfirst, intelligent, v3
+    project_key = Column(String(36), nullable=False)  # Project ID, or '*' for all projects
+
+    # Cached result
+    fingerprint = Column(String(32), nullable=False)  # Corpus the analysis ran over
+    result = Column(JSON, nullable=False)  # GapAnalysisResult as a dict
+    analyzed_at = Column(DateTime(timezone=True), default=utc_now, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('tenant_id', 'mode', 'project_key', name='uq_gap_analysis_cache_key'),
+    )
+
+    def __repr__(self):
+        return f"<GapAnalysisCache {self.mode}:{self.project_key}>"
+
+
 def init_database():
     """Initialize database (create tables)"""
     Base.metadata.create_all(bind=engine)
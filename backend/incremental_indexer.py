@@ -26,6 +26,10 @@ from typing import List, Dict, Optional, Set
 from datetime import datetime
 from openai import AzureOpenAI
 
+from rag.embedding_index import (
+    load_embedding_index, save_embedding_index, remove_embedding_index, append_embeddings
+)
+
 # Azure OpenAI Configuration
 AZURE_OPENAI_ENDPOINT = "https://rishi-mihfdoty-eastus2.cognitiveservices.azure.com"
 AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
@@ -94,35 +98,30 @@ class IncrementalIndexer:
         """Load existing embedding index if it exists"""
         if TEMP_INDEX_FILE.exists():
             # Resume from temp file
-            with open(TEMP_INDEX_FILE, 'rb') as f:
-                return pickle.load(f)
+            return load_embedding_index(TEMP_INDEX_FILE)
         elif FINAL_INDEX_FILE.exists():
             # Start from final file
-            with open(FINAL_INDEX_FILE, 'rb') as f:
-                return pickle.load(f)
+            return load_embedding_index(FINAL_INDEX_FILE)
         return None
 
     def _save_temp_index(self, index: Dict):
         """Save to temp file (safe - doesn't touch main index)"""
-        with open(TEMP_INDEX_FILE, 'wb') as f:
-            pickle.dump(index, f)
+        save_embedding_index(index, TEMP_INDEX_FILE)
         print(f"  ✓ Saved temp index ({len(index['chunks'])} chunks)")
 
     def _finalize_index(self, index: Dict):
         """Safely swap temp index to final (with backup)"""
-        # Backup existing
+        # Backup existing (re-saved rather than copied, so a matrix kept
+        # beside the pickle is backed up too)
         if FINAL_INDEX_FILE.exists():
-            import shutil
-            shutil.copy(FINAL_INDEX_FILE, BACKUP_INDEX_FILE)
+            save_embedding_index(load_embedding_index(FINAL_INDEX_FILE), BACKUP_INDEX_FILE)
             print(f"  ✓ Backed up existing index")
 
         # Move temp to final
-        with open(FINAL_INDEX_FILE, 'wb') as f:
-            pickle.dump(index, f)
+        save_embedding_index(index, FINAL_INDEX_FILE)
 
         # Remove temp
-        if TEMP_INDEX_FILE.exists():
-            TEMP_INDEX_FILE.unlink()
+        remove_embedding_index(TEMP_INDEX_FILE)
 
         print(f"  ✓ Finalized index ({len(index['chunks'])} chunks)")
 
@@ -199,8 +198,7 @@ class IncrementalIndexer:
         """Reset all progress (start fresh)"""
         if PROGRESS_FILE.exists():
             PROGRESS_FILE.unlink()
-        if TEMP_INDEX_FILE.exists():
-            TEMP_INDEX_FILE.unlink()
+        remove_embedding_index(TEMP_INDEX_FILE)
         self.progress = self._load_progress()
         print("✓ Reset complete - ready to start fresh")
 
@@ -298,15 +296,8 @@ class IncrementalIndexer:
 
             # Add to index
             embedding_index['chunks'].extend(all_chunks)
-            new_embeddings = np.array(all_embeddings, dtype=np.float32)
-
-            if len(embedding_index['embeddings']) == 0:
-                embedding_index['embeddings'] = new_embeddings
-            else:
-                embedding_index['embeddings'] = np.vstack([
-                    embedding_index['embeddings'],
-                    new_embeddings
-                ])
+            # Normalized/half-precision indexes get their new rows in kind
+            append_embeddings(embedding_index, all_embeddings)
 
             # Update doc_ids set
             if isinstance(embedding_index.get('doc_ids'), set):
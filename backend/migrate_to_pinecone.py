@@ -7,7 +7,6 @@ This script will:
 """
 
 import os
-import pickle
 import time
 from typing import Dict, List, Any
 from dotenv import load_dotenv
@@ -17,6 +16,8 @@ load_dotenv("/Users/rishitjain/Downloads/knowledgevault_backend/.env")
 
 from pinecone import Pinecone
 
+from rag.embedding_index import load_embedding_index
+
 # Configuration
 PICKLE_PATH = "/Users/rishitjain/Downloads/knowledgevault_backend/club_data/embedding_index.pkl"
 BATCH_SIZE = 100  # Pinecone recommends batches of 100
@@ -29,8 +30,7 @@ def load_pickle_embeddings() -> Dict:
         print(f"❌ Pickle file not found: {PICKLE_PATH}")
         return {}
 
-    with open(PICKLE_PATH, "rb") as f:
-        data = pickle.load(f)
+    data = load_embedding_index(PICKLE_PATH)
 
     print(f"✅ Loaded pickle data with {len(data)} top-level keys")
     return data
@@ -50,8 +50,8 @@ def extract_vectors(data: Dict) -> List[Dict]:
         print(f"Embeddings type: {type(embeddings)}, shape: {embeddings.shape if hasattr(embeddings, 'shape') else 'N/A'}")
 
         for i, chunk in enumerate(chunks):
-            # Get embedding for this chunk
-            embedding = embeddings[i]
+            # Get embedding for this chunk (rebuilt indexes store float16 rows)
+            embedding = np.asarray(embeddings[i], dtype=np.float32)
 
             # Extract metadata
             if isinstance(chunk, dict):
@@ -0,0 +1,64 @@
+"""
+Add Gap Analysis Cache Migration
+Date: 2026-10-17
+
+Adds the gap_analysis_cache table holding the last gap analysis result per
+(tenant, mode, project), and drops the "gap_analysis_cache" entries earlier
+versions kept in Tenant.settings.
+"""
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+from database.config import get_database_url
+from database.models import GapAnalysisCache, Tenant
+
+
+def upgrade():
+    """Add gap analysis cache table"""
+    engine = create_engine(get_database_url())
+
+    if 'gap_analysis_cache' not in inspect(engine).get_table_names():
+        GapAnalysisCache.__table__.create(engine)
+        print("✓ Created table: gap_analysis_cache")
+    else:
+        print("⊘ Table already exists: gap_analysis_cache")
+
+    session = sessionmaker(bind=engine)()
+    try:
+        cleared = 0
+        for tenant in session.query(Tenant).all():
+            if 'gap_analysis_cache' in (tenant.settings or {}):
+                tenant.settings = {
+                    k: v for k, v in tenant.settings.items() if k != 'gap_analysis_cache'
+                }
+                cleared += 1
+        session.commit()
+        print(f"✓ Removed settings cache from {cleared} tenant(s)")
+    finally:
+        session.close()
+
+    print("\n✓ Gap analysis cache migration complete")
+
+
+def downgrade():
+    """Remove gap analysis cache table"""
+    engine = create_engine(get_database_url())
+
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("DROP TABLE IF EXISTS gap_analysis_cache"))
+            conn.commit()
+            print("✓ Dropped table: gap_analysis_cache")
+        except Exception as e:
+            print(f"⚠ Could not drop gap_analysis_cache: {e}")
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'downgrade':
+        print("Running downgrade migration...")
+        downgrade()
+    else:
+        print("Running upgrade migration...")
+        upgrade()
@@ -0,0 +1,64 @@
+"""
+Add Gap Analysis Index Migration
+Date: 2026-10-16
+
+Adds a partial index to the Document table so gap analysis can fetch the
+most recent work documents straight from the index:
+- ix_document_tenant_status_date: (tenant_id, status, classification,
+  source_created_at DESC) WHERE is_deleted = false
+"""
+
+from sqlalchemy import create_engine, Index, inspect, text
+from database.config import get_database_url
+from database.models import Document
+
+
+def upgrade():
+    """Add gap analysis index"""
+    engine = create_engine(get_database_url())
+
+    # Check which indexes already exist
+    inspector = inspect(engine)
+    existing_indexes = {idx['name'] for idx in inspector.get_indexes('documents')}
+
+    with engine.connect() as conn:
+        if 'ix_document_tenant_status_date' not in existing_indexes:
+            Index(
+                'ix_document_tenant_status_date',
+                Document.tenant_id,
+                Document.status,
+                Document.classification,
+                Document.source_created_at.desc(),
+                postgresql_where=(Document.is_deleted == False),
+                sqlite_where=(Document.is_deleted == False)
+            ).create(conn)
+            conn.commit()
+            print("✓ Created index: ix_document_tenant_status_date")
+        else:
+            print("⊘ Index already exists: ix_document_tenant_status_date")
+
+    print("\n✓ Gap analysis index created successfully")
+
+
+def downgrade():
+    """Remove gap analysis index"""
+    engine = create_engine(get_database_url())
+
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("DROP INDEX IF EXISTS ix_document_tenant_status_date"))
+            conn.commit()
+            print("✓ Dropped index: ix_document_tenant_status_date")
+        except Exception as e:
+            print(f"⚠ Could not drop ix_document_tenant_status_date: {e}")
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'downgrade':
+        print("Running downgrade migration...")
+        downgrade()
+    else:
+        print("Running upgrade migration...")
+        upgrade()
@@ -0,0 +1,156 @@
+"""
+Embedding Index Files
+Loads and saves the pickled embedding indexes searched by EnhancedRAG and
+EnhancedRAGv2.
+
+An index pickle holds the chunks and their metadata. Older indexes keep the
+embedding matrix inline under "embeddings". Indexes built by
+KnowledgeService.rebuild_embedding_index keep it beside the pickle in the
+.npy file named by "embeddings_file", which loaders memory-map. Every
+save writes its matrix to a new file and then swaps the pickle in with a
+rename, so a reader never pairs a pickle with another save's matrix.
+
+Indexes whose metadata sets "normalized" hold unit-length rows at
+metadata["embedding_dtype"] precision (float16 for rebuilt indexes);
+others hold the raw float32 vectors. Rows are scored and appended through
+cosine_scores and append_embeddings, which handle both.
+"""
+
+import os
+import uuid
+import pickle
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+# Precision of the unit-length rows in rebuilt indexes
+EMBEDDING_DTYPE = "float16"
+
+# Rows of a float16 matrix upcast to float32 at a time when scoring, so
+# search never materializes a float32 copy of the whole matrix
+SEMANTIC_SCORE_BLOCK_ROWS = 4096
+
+
+def load_embedding_index(index_path, mmap: bool = True) -> Dict:
+    """
+    Load an index pickle with its matrix under "embeddings", whichever
+    layout it was saved in.
+
+    Args:
+        index_path: Path to the index pickle
+        mmap: Memory-map a separate .npy matrix (read-only) rather than
+            reading it into memory
+    """
+    with open(index_path, 'rb') as f:
+        index = pickle.load(f)
+    if isinstance(index, dict) and 'embeddings' not in index and index.get('embeddings_file'):
+        index['embeddings'] = np.load(
+            Path(index_path).parent / index['embeddings_file'],
+            mmap_mode='r' if mmap else None
+        )
+    return index
+
+
+def save_embedding_index(index: Dict, index_path) -> None:
+    """
+    Save an index loaded by load_embedding_index, keeping its layout.
+
+    A matrix kept in an .npy file is written to a new file beside
+    index_path; the pickle then gets everything but the matrix.
+    """
+    index_path = Path(index_path)
+    if index.get('embeddings_file'):
+        embeddings_path = new_embeddings_path(index_path)
+        with open(embeddings_path, 'wb') as f:
+            np.save(f, np.asarray(index['embeddings']))
+        index = {k: v for k, v in index.items() if k != 'embeddings'}
+        index['embeddings_file'] = embeddings_path.name
+    write_index_pickle(index, index_path)
+
+
+def new_embeddings_path(index_path) -> Path:
+    """A fresh <pickle name>.<id>.npy path for a save's matrix."""
+    index_path = Path(index_path)
+    return index_path.with_name(f"{index_path.stem}.{uuid.uuid4().hex[:12]}.npy")
+
+
+def write_index_pickle(index: Dict, index_path) -> None:
+    """
+    Replace an index pickle in one rename, then delete older matrix files.
+
+    The matrix of the replaced pickle is kept, since other processes may
+    still be loading it; anything older than that is removed.
+    """
+    index_path = Path(index_path)
+    tmp_path = index_path.with_name(index_path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, index_path)
+
+    current = index.get('embeddings_file')
+    stale = sorted(
+        (path for path in _matrix_files(index_path) if path.name != current),
+        key=lambda path: path.stat().st_mtime
+    )
+    for path in stale[:-1]:
+        path.unlink(missing_ok=True)
+
+
+def remove_embedding_index(index_path) -> None:
+    """Delete an index pickle and every matrix file saved beside it."""
+    index_path = Path(index_path)
+    for path in [index_path, *_matrix_files(index_path)]:
+        path.unlink(missing_ok=True)
+
+
+def _matrix_files(index_path: Path):
+    # <stem>.npy from earlier saves and <stem>.<id>.npy from current ones
+    return list(index_path.parent.glob(f"{index_path.stem}.*npy"))
+
+
+def embedding_rows(index: Dict, vectors) -> np.ndarray:
+    """Bring new embedding vectors into the index's stored row format."""
+    rows = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    metadata = index.get('metadata', {})
+    if metadata.get('normalized'):
+        rows = rows / (np.linalg.norm(rows, axis=1, keepdims=True) + 1e-8)
+    return rows.astype(metadata.get('embedding_dtype') or np.float32)
+
+
+def append_embeddings(index: Dict, vectors) -> None:
+    """Append embedding vectors to index["embeddings"] in its row format."""
+    rows = embedding_rows(index, vectors)
+    matrix = index.get('embeddings')
+    if matrix is None or len(matrix) == 0:
+        index['embeddings'] = rows
+    else:
+        index['embeddings'] = np.vstack([matrix, rows])
+
+
+def cosine_scores(index: Dict, query_embedding: np.ndarray) -> np.ndarray:
+    """Cosine similarity of a query embedding to every row of the index."""
+    matrix = index['embeddings']
+    normalized = index.get('metadata', {}).get('normalized')
+    query_norm = (query_embedding / (np.linalg.norm(query_embedding) + 1e-8)).astype(np.float32)
+
+    if matrix.dtype != np.float16:
+        if not normalized:
+            matrix = matrix / (np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-8)
+        return np.dot(matrix, query_norm)
+
+    # Mixed float16/float32 np.dot would upcast the whole (memmapped)
+    # matrix per query; upcasting block by block keeps memory bounded and
+    # the BLAS float32 path, which is faster than float16 dot
+    scores = np.empty(len(matrix), dtype=np.float32)
+    for start in range(0, len(matrix), SEMANTIC_SCORE_BLOCK_ROWS):
+        block = matrix[start:start + SEMANTIC_SCORE_BLOCK_ROWS].astype(np.float32)
+        if not normalized:
+            block /= np.linalg.norm(block, axis=1, keepdims=True) + 1e-8
+        scores[start:start + len(block)] = np.dot(block, query_norm)
+    return scores
+
+
+def embedding_matrix_rows(index: Dict, rows) -> np.ndarray:
+    """Selected rows of the index's matrix as a float32 array."""
+    return np.asarray(index['embeddings'][rows], dtype=np.float32)
@@ -10,7 +10,6 @@ Enhanced RAG Module with:
 """
 
 import json
-import pickle
 import numpy as np
 import re
 import hashlib
@@ -20,6 +19,8 @@ from openai import AzureOpenAI
 from functools import lru_cache
 import time
 
+from rag.embedding_index import load_embedding_index, cosine_scores, embedding_matrix_rows
+
 # Azure OpenAI Configuration
 AZURE_OPENAI_ENDPOINT = "https://rishi-mihfdoty-eastus2.cognitiveservices.azure.com"
 AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
@@ -403,8 +404,7 @@ class EnhancedRAG:
 
         # Load embedding index
         print("Loading embedding index...")
-        with open(embedding_index_path, 'rb') as f:
-            self.index = pickle.load(f)
+        self.index = load_embedding_index(embedding_index_path)
         print(f"✓ Loaded {len(self.index['chunks'])} chunks")
 
         # Initialize components
@@ -458,14 +458,11 @@ class EnhancedRAG:
         query_embedding = self._get_query_embedding(expanded_query)
 
         # Get stored data
-        chunk_embeddings = self.index['embeddings']
         chunks = self.index['chunks']
         bm25_index = self.index.get('bm25_index')
 
         # Semantic search
-        query_norm = query_embedding / (np.linalg.norm(query_embedding) + 1e-8)
-        chunk_norms = chunk_embeddings / (np.linalg.norm(chunk_embeddings, axis=1, keepdims=True) + 1e-8)
-        semantic_scores = np.dot(chunk_norms, query_norm)
+        semantic_scores = cosine_scores(self.index, query_embedding)
 
         # BM25 search
         if bm25_index:
@@ -539,7 +536,7 @@ class EnhancedRAG:
         if self.use_mmr and len(results) > top_k:
             # Get embeddings for MMR
             embedding_indices = [r['embedding_idx'] for r in results]
-            doc_embeddings = self.index['embeddings'][embedding_indices]
+            doc_embeddings = embedding_matrix_rows(self.index, embedding_indices)
             query_embedding = self._get_query_embedding(expanded_query)
 
             results = MMRSelector.select(
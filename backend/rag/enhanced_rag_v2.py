@@ -22,7 +22,6 @@ v2.1 Additions:
 """
 
 import json
-import pickle
 import numpy as np
 import re
 import hashlib
@@ -35,6 +34,11 @@ from datetime import datetime
 import time
 from collections import defaultdict
 
+from rag.embedding_index import (
+    load_embedding_index, save_embedding_index,
+    append_embeddings, cosine_scores, embedding_matrix_rows
+)
+
 # Azure OpenAI Configuration
 AZURE_OPENAI_ENDPOINT = "https://rishi-mihfdoty-eastus2.cognitiveservices.azure.com"
 AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
@@ -816,8 +820,7 @@ class EnhancedRAGv2:
 
         # Load embedding index
         print("Loading embedding index...")
-        with open(embedding_index_path, 'rb') as f:
-            self.index = pickle.load(f)
+        self.index = load_embedding_index(embedding_index_path)
         print(f"✓ Loaded {len(self.index['chunks'])} chunks")
 
         # Initialize components
@@ -878,14 +881,11 @@ class EnhancedRAGv2:
 
         query_embedding = self._get_query_embedding(expanded_query)
 
-        chunk_embeddings = self.index['embeddings']
         chunks = self.index['chunks']
         bm25_index = self.index.get('bm25_index')
 
         # Semantic search
-        query_norm = query_embedding / (np.linalg.norm(query_embedding) + 1e-8)
-        chunk_norms = chunk_embeddings / (np.linalg.norm(chunk_embeddings, axis=1, keepdims=True) + 1e-8)
-        semantic_scores = np.dot(chunk_norms, query_norm)
+        semantic_scores = cosine_scores(self.index, query_embedding)
 
         # BM25 search with domain-aware tokenization
         if bm25_index:
@@ -1003,7 +1003,7 @@ class EnhancedRAGv2:
         # Apply MMR with adaptive lambda
         if self.use_mmr and len(results) > top_k:
             embedding_indices = [r['embedding_idx'] for r in results]
-            doc_embeddings = self.index['embeddings'][embedding_indices]
+            doc_embeddings = embedding_matrix_rows(self.index, embedding_indices)
             query_embedding = self._get_query_embedding(expanded_query)
 
             results = MMRSelector.select(
@@ -1330,13 +1330,7 @@ You will be evaluated on citation accuracy. Uncited claims are considered failur
                         self.index['chunks'].append(chunk)
 
                         # Add embedding
-                        if len(self.index['embeddings']) == 0:
-                            self.index['embeddings'] = embedding.reshape(1, -1)
-                        else:
-                            self.index['embeddings'] = np.vstack([
-                                self.index['embeddings'],
-                                embedding.reshape(1, -1)
-                            ])
+                        append_embeddings(self.index, embedding)
 
                         added_chunks += 1
                         chunk_idx += 1
@@ -1349,8 +1343,7 @@ You will be evaluated on citation accuracy. Uncited claims are considered failur
 
         # Save updated index
         if added_chunks > 0:
-            with open(self.index_path, 'wb') as f:
-                pickle.dump(self.index, f)
+            save_embedding_index(self.index, self.index_path)
 
         return {
             'status': 'success',
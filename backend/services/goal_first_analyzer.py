@@ -545,3 +545,14 @@ Generate 5-15 high-quality TECHNICAL questions. Quality over quantity."""
             gaps.append(gap)
 
         return gaps
+
+
+# Singleton instance (the analyzer keeps no per-analysis state)
+_analyzer = None
+
+def get_goal_first_analyzer() -> GoalFirstGapAnalyzer:
+    """Get or create the shared GoalFirstGapAnalyzer"""
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = GoalFirstGapAnalyzer()
+    return _analyzer
@@ -30,6 +30,7 @@ Research foundations:
 """
 
 import re
+import sys
 import json
 import logging
 from dataclasses import dataclass, field
@@ -500,16 +501,22 @@ class EntityNormalizer:
         # Capitalize properly
         return ' '.join(w.title() for w in words if w)
 
-    def add_alias(self, alias: str, canonical: str):
-        """Add an alias mapping"""
+    def add_alias(self, alias: str, canonical: str) -> str:
+        """
+        Add an alias mapping and return the canonical name.
+
+        Canonical names are interned, so the mentions of one entity across
+        documents share a single string.
+        """
         alias_lower = alias.lower().strip()
-        canonical_clean = self._clean_name(canonical)
+        canonical_clean = sys.intern(self._clean_name(canonical))
 
         self.canonical_map[alias_lower] = canonical_clean
 
         if canonical_clean not in self.entity_clusters:
             self.entity_clusters[canonical_clean] = set()
         self.entity_clusters[canonical_clean].add(alias)
+        return canonical_clean
 
     def find_similar(self, name: str, threshold: float = 0.8) -> Optional[str]:
         """Find a similar canonical name if exists"""
@@ -524,8 +531,15 @@ class EntityNormalizer:
 
     def merge_if_similar(self, name: str) -> str:
         """Normalize and merge with existing if similar"""
-        # Check exact match first
-        normalized = self.normalize(name)
+        # Check exact match first: a known alias or an existing canonical
+        # name resolves without the fuzzy scan over every cluster
+        canonical = self.canonical_map.get(name.lower().strip())
+        if canonical is not None:
+            return canonical
+
+        normalized = self._clean_name(name)
+        if normalized in self.entity_clusters:
+            return self.add_alias(name, normalized)
 
         # Check for similar existing entity
         similar = self.find_similar(normalized)
@@ -534,8 +548,7 @@ class EntityNormalizer:
             return similar
 
         # Register as new canonical
-        self.add_alias(name, normalized)
-        return normalized
+        return self.add_alias(name, normalized)
 
 
 # =============================================================================
@@ -1959,5 +1972,11 @@ class IntelligentGapDetector:
 # =============================================================================
 
 def get_intelligent_gap_detector() -> IntelligentGapDetector:
-    """Factory function"""
+    """
+    Factory function.
+
+    Returns a fresh detector on every call: it accumulates the documents of
+    one analysis, so it can't be shared across concurrent requests. The
+    expensive pieces (spaCy model, pattern tables) are module-level already.
+    """
     return IntelligentGapDetector()
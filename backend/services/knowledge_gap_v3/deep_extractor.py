@@ -16,6 +16,7 @@ from dataclasses import dataclass, field, asdict
 from datetime import datetime
 from enum import Enum
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 from services.openai_client import get_openai_client
 
@@ -638,15 +639,20 @@ class DeepDocumentExtractor:
         Returns:
             List of DocumentExtraction objects
         """
-        results = []
+        if not documents:
+            return []
 
-        for doc in documents:
-            extraction = self.extract(
+        def _extract(doc: Dict[str, str]) -> DocumentExtraction:
+            return self.extract(
                 doc_id=doc["doc_id"],
                 title=doc["title"],
                 content=doc["content"]
             )
-            results.append(extraction)
+
+        # Each extraction is an independent, I/O-bound LLM call, so run them
+        # on a thread pool; map() keeps results in input order.
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrent, len(documents)))) as executor:
+            results = list(executor.map(_extract, documents))
 
         logger.info(f"[DeepExtractor] Batch complete: {len(results)} documents")
         return results
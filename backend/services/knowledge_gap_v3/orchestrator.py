@@ -15,6 +15,9 @@ from datetime import datetime
 # Get model from environment
 DEFAULT_MODEL = os.getenv("AZURE_CHAT_DEPLOYMENT", "gpt-5-chat")
 
+# Concurrent Stage 1 extraction calls
+EXTRACTION_CONCURRENCY = 10
+
 from .deep_extractor import DeepDocumentExtractor, DocumentExtraction
 from .knowledge_graph import KnowledgeGraph, Entity, EntityType
 from .gap_analyzers import GapAnalyzerEngine, Gap, GapType, GapSeverity
@@ -167,13 +170,17 @@ class KnowledgeGapOrchestrator:
         # =====================================================================
         logger.info("[Orchestrator] Stage 1: Deep Document Extraction")
 
-        for doc in documents:
-            extraction = self.extractor.extract(
-                doc_id=doc.get("doc_id") or doc.get("id"),
-                title=doc.get("title", "Untitled"),
-                content=doc.get("content", "")
-            )
-            self.extractions.append(extraction)
+        self.extractions = self.extractor.extract_batch(
+            [
+                {
+                    "doc_id": doc.get("doc_id") or doc.get("id"),
+                    "title": doc.get("title", "Untitled"),
+                    "content": doc.get("content", "")
+                }
+                for doc in documents
+            ],
+            max_concurrent=EXTRACTION_CONCURRENCY
+        )
 
         logger.info(f"[Orchestrator] Extracted from {len(self.extractions)} documents")
 
@@ -10,37 +10,102 @@ Supports two modes of gap analysis:
 import os
 import io
 import json
-import pickle
+import hashlib
 import asyncio
 import logging
-from datetime import datetime, timezone
 from typing import List, Dict, Optional, Tuple, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
+from collections import Counter
 from pathlib import Path
-import tempfile
+from difflib import SequenceMatcher
+from concurrent.futures import ThreadPoolExecutor
 import threading
+import time
 
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+import numpy as np
+
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, or_, func, case, cast, event, Text
+from sqlalchemy.exc import IntegrityError
 
 from services.openai_client import get_openai_client
+from utils.tokens import count_tokens
+from utils.bounded_cache import BoundedCache
+from rag.embedding_index import (
+    load_embedding_index, new_embeddings_path, write_index_pickle, EMBEDDING_DTYPE
+)
 
 from database.models import (
-    Document, KnowledgeGap, GapAnswer, Project, Tenant,
+    Document, KnowledgeGap, GapAnswer, GapAnalysisCache, Tenant,
     DocumentStatus, DocumentClassification, GapCategory, GapStatus,
     generate_uuid, utc_now
 )
 
 # Token budget for Knowledge Gap analysis
 # GPT-4o has 128K context, but we want to leave room for system prompt and response
-# Estimate: 1 token ≈ 4 chars for English text
-MAX_GAP_ANALYSIS_CHARS = 400000  # ~100K tokens, leaving buffer for prompt/response
+MAX_GAP_ANALYSIS_TOKENS = 100000  # Leaves buffer for prompt/response
 CHARS_PER_DOC_SUMMARY = 3000  # Estimated chars per structured summary
+# The budget is split into shards analyzed by concurrent LLM calls
+GAP_ANALYSIS_SHARD_TOKENS = 20000  # Tokens per call
+GAP_ANALYSIS_PARALLEL_SHARDS = 5  # Concurrent shard calls
+# Embedding index rebuilds send chunks in batches, several requests at a time
+EMBEDDING_BATCH_SIZE = 100  # Chunks per embedding request
+EMBEDDING_PARALLEL_BATCHES = 5  # Concurrent embedding requests
+# LLM category labels -> GapCategory, shared by the gap-saving loops
+GAP_CATEGORY_MAP = {
+    "decision": GapCategory.DECISION,
+    "technical": GapCategory.TECHNICAL,
+    "process": GapCategory.PROCESS,
+    "context": GapCategory.CONTEXT,
+    "relationship": GapCategory.RELATIONSHIP,
+    "timeline": GapCategory.TIMELINE,
+    "outcome": GapCategory.OUTCOME,
+    "rationale": GapCategory.RATIONALE
+}
+# Goal-first analyzer uses its own decision-oriented labels
+GOALFIRST_CATEGORY_MAP = {
+    "strategic": GapCategory.DECISION,
+    "decision": GapCategory.DECISION,
+    "scope": GapCategory.CONTEXT,
+    "timeline": GapCategory.TIMELINE,
+    "financial": GapCategory.RATIONALE,
+    "competition": GapCategory.DECISION,
+    "context": GapCategory.CONTEXT
+}
+# Gaps from different shards whose titles are at least this similar
+# (cosine similarity of title embeddings) are merged
+GAP_TITLE_SIMILARITY = 0.9
+# Raw content the intelligent detector sees per document (truncated in SQL)
+INTELLIGENT_CONTENT_CHARS = 30000
+# Structured summary fields rendered for gap analysis, in prompt order:
+# (scope, key, separator, label, max items); scope "entities" reads from
+# the summary's entities dict
+ANALYSIS_SUMMARY_FIELDS = (
+    (None, "key_topics", ", ", "Key Topics", None),
+    ("entities", "people", ", ", "People", None),
+    ("entities", "systems", ", ", "Systems", None),
+    ("entities", "organizations", ", ", "Organizations", None),
+    (None, "decisions", "; ", "Decisions", None),  # Critical for gap analysis
+    (None, "processes", "; ", "Processes", None),
+    (None, "dates", "; ", "Key Dates", 5),
+    (None, "action_items", "; ", "Action Items", 5),
+    (None, "technical_details", "; ", "Technical", 3)
+)
+# Structured summary fields condensed for the intelligent detector:
+# (key, separator, label, max items)
+INTELLIGENT_SUMMARY_FIELDS = (
+    ("key_topics", ", ", "Topics", None),
+    ("decisions", "; ", "Decisions", None),
+    ("processes", "; ", "Processes", None),
+    ("action_items", "; ", "Actions", 5),
+    ("technical_details", "; ", "Technical", 3)
+)
 from services.multistage_gap_analyzer import (
-    MultiStageGapAnalyzer, DocumentContext, MultiStageAnalysisResult
+    DocumentContext, MultiStageAnalysisResult, get_multistage_gap_analyzer
 )
 from services.goal_first_analyzer import (
-    GoalFirstGapAnalyzer, DocumentContext as GFDocumentContext, GoalFirstAnalysisResult
+    DocumentContext as GFDocumentContext, GoalFirstAnalysisResult,
+    get_goal_first_analyzer
 )
 from services.intelligent_gap_detector import (
     IntelligentGapDetector, get_intelligent_gap_detector, Gap
@@ -56,6 +121,86 @@ except ImportError as e:
 
 logger = logging.getLogger(__name__)
 
+# Token counts of prepared documents, keyed by (doc id, updated_at, content limit)
+_DOC_TOKEN_CACHE_SIZE = 4096
+_DOC_TOKEN_CACHE = BoundedCache(_DOC_TOKEN_CACHE_SIZE)
+
+# Condensed structured summaries, keyed by (doc id, updated_at)
+_SUMMARY_CONTENT_CACHE_SIZE = 4096
+_SUMMARY_CONTENT_CACHE = BoundedCache(_SUMMARY_CONTENT_CACHE_SIZE)
+
+# Tenant data directories, keyed by tenant id -> (cached at, data_directory).
+# Dropped on tenant update/delete in this process; the TTL covers the rest.
+_TENANT_DATA_DIR_CACHE_SIZE = 256
+_TENANT_DATA_DIR_CACHE = BoundedCache(_TENANT_DATA_DIR_CACHE_SIZE)
+_TENANT_DATA_DIR_TTL = 60  # seconds
+
+
+@event.listens_for(Tenant, 'after_update')
+@event.listens_for(Tenant, 'after_delete')
+def _invalidate_tenant_data_dir(mapper, connection, target):
+    """Forget a tenant's cached data directory when the row changes"""
+    _TENANT_DATA_DIR_CACHE.pop(target.id, None)
+
+
+# Sentence ends the document chunker prefers to break at
+_SENTENCE_ENDS = (". ", "! ", "? ", ".\n", "!\n", "?\n")
+
+
+def _gap_priority(gap_data: Dict) -> int:
+    """An LLM-reported gap priority as an int in 1-5 (3 if missing or malformed)"""
+    try:
+        priority = int(gap_data.get("priority", 3))
+    except (TypeError, ValueError):
+        priority = 3
+    return min(max(priority, 1), 5)
+
+
+def _chunk_document(
+    title: Optional[str],
+    sender: Optional[str],
+    content: Optional[str],
+    chunk_size: int = 1000,
+    overlap: int = 200
+) -> List[str]:
+    """Split document content into overlapping chunks."""
+    content = content or ""
+    if not content:
+        return []
+
+    # Add title/metadata to first chunk
+    header = f"Title: {title or 'Untitled'}\n"
+    if sender:
+        header += f"From: {sender}\n"
+    header += "\n"
+
+    chunks = []
+    start = 0
+    content_len = len(content)
+    min_break = chunk_size // 2 + 1
+
+    while start < content_len:
+        end = start + chunk_size
+
+        # Try to break at the last sentence end in the back half of the
+        # window; rfind scans backwards in C and stops at the first hit
+        if end < content_len:
+            boundary = max(content.rfind(sep, start + min_break, end) for sep in _SENTENCE_ENDS)
+            if boundary != -1:
+                end = boundary + 2
+
+        chunk_text = content[start:end].strip()
+
+        if chunk_text:
+            # Add header to first chunk
+            if start == 0:
+                chunk_text = header + chunk_text
+            chunks.append(chunk_text)
+
+        start = end - overlap
+
+    return chunks
+
 
 # Azure Whisper Deployment (still needed for transcription)
 AZURE_WHISPER_DEPLOYMENT = os.getenv("AZURE_WHISPER_DEPLOYMENT", "whisper")
@@ -128,6 +273,13 @@ Respond in JSON format:
 }}
 """
 
+    # The prompt has a single substitution, so render the fixed text around
+    # {documents} once here and write it around each shard instead of running
+    # str.format over the whole document payload
+    GAP_ANALYSIS_PROMPT_PREFIX, GAP_ANALYSIS_PROMPT_SUFFIX = (
+        GAP_ANALYSIS_PROMPT.format(documents="\0").split("\0")
+    )
+
     def __init__(self, db: Session):
         self.db = db
         self.client = get_openai_client()
@@ -140,7 +292,8 @@ Respond in JSON format:
         self,
         doc: Document,
         use_summary: bool = True,
-        max_content_chars: int = 4000
+        max_content_chars: int = 4000,
+        include_header: bool = True
     ) -> str:
         """
         Prepare document content for Knowledge Gap analysis.
@@ -152,75 +305,70 @@ Respond in JSON format:
             doc: Document model instance
             use_summary: Whether to use structured_summary (default True)
             max_content_chars: Max chars if falling back to raw content
+            include_header: Wrap the body in a "---" block with title/type/date
+                metadata. Analyzers that carry metadata on DocumentContext
+                pass False to get the body alone.
 
         Returns:
             Formatted document text for analysis
         """
-        # Header with metadata
-        doc_text = f"---\n"
-        doc_text += f"Title: {doc.title or 'Untitled'}\n"
-        doc_text += f"Type: {doc.source_type or 'unknown'}\n"
-        doc_text += f"Date: {doc.source_created_at.isoformat() if doc.source_created_at else 'Unknown'}\n"
-        if doc.sender:
-            doc_text += f"From: {doc.sender}\n"
+        # Accumulate fragments and join once rather than growing a string
+        parts = []
+        append = parts.append
+
+        if include_header:
+            # Header with metadata
+            append("---\n")
+            append(f"Title: {doc.title or 'Untitled'}\n")
+            append(f"Type: {doc.source_type or 'unknown'}\n")
+            append(f"Date: {doc.source_created_at.isoformat() if doc.source_created_at else 'Unknown'}\n")
+            if doc.sender:
+                append(f"From: {doc.sender}\n")
+            append("\n")
 
         # Use structured summary if available (Phase 2 extraction)
-        if use_summary and doc.structured_summary:
-            summary = doc.structured_summary
-            doc_text += f"\nSummary: {summary.get('summary', 'No summary')}\n"
-
-            # Key topics
-            if summary.get('key_topics'):
-                doc_text += f"Key Topics: {', '.join(summary['key_topics'])}\n"
-
-            # Entities
-            entities = summary.get('entities', {})
-            if entities.get('people'):
-                doc_text += f"People: {', '.join(entities['people'])}\n"
-            if entities.get('systems'):
-                doc_text += f"Systems: {', '.join(entities['systems'])}\n"
-            if entities.get('organizations'):
-                doc_text += f"Organizations: {', '.join(entities['organizations'])}\n"
-
-            # Decisions (critical for gap analysis)
-            if summary.get('decisions'):
-                doc_text += f"Decisions: {'; '.join(summary['decisions'])}\n"
-
-            # Processes
-            if summary.get('processes'):
-                doc_text += f"Processes: {'; '.join(summary['processes'])}\n"
-
-            # Dates/deadlines
-            if summary.get('dates'):
-                dates_str = '; '.join([f"{d.get('date', '?')}: {d.get('event', '?')}"
-                                       for d in summary['dates'][:5]])
-                doc_text += f"Key Dates: {dates_str}\n"
-
-            # Action items
-            if summary.get('action_items'):
-                doc_text += f"Action Items: {'; '.join(summary['action_items'][:5])}\n"
-
-            # Technical details
-            if summary.get('technical_details'):
-                doc_text += f"Technical: {'; '.join(summary['technical_details'][:3])}\n"
-
-            doc_text += f"Word Count: ~{summary.get('word_count', 'unknown')}\n"
+        summary = doc.structured_summary if use_summary else None
+        if summary:
+            append(f"Summary: {summary.get('summary', 'No summary')}\n")
+
+            entities = summary.get('entities') or {}
+
+            for scope, key, sep, label, limit in ANALYSIS_SUMMARY_FIELDS:
+                values = (entities if scope else summary).get(key)
+                if not values:
+                    continue
+                values = values[:limit]
+                if key == "dates":
+                    values = [f"{d.get('date', '?')}: {d.get('event', '?')}" for d in values]
+                append(f"{label}: {sep.join(values)}\n")
+
+            append(f"Word Count: ~{summary.get('word_count', 'unknown')}\n")
         else:
             # Fallback: use truncated raw content
-            content = doc.content or ''
-            if len(content) > max_content_chars:
-                content = content[:max_content_chars] + f"\n[... truncated, {len(doc.content)} total chars]"
-            doc_text += f"\nContent:\n{content}\n"
+            full = doc.content or ''
+            full_len = len(full)
+            if full_len > max_content_chars:
+                body = full[:max_content_chars] + f"\n[... truncated, {full_len} total chars]"
+            else:
+                body = full
+            if not include_header:
+                return body
+            append("Content:\n")
+            append(body)
+            append("\n")
 
-        doc_text += "---\n"
-        return doc_text
+        if include_header:
+            append("---\n")
+        return "".join(parts)
 
     def _prepare_documents_for_analysis(
         self,
         documents: List[Document],
-        max_total_chars: int = MAX_GAP_ANALYSIS_CHARS,
-        prioritize_recent: bool = True
-    ) -> Tuple[str, Dict[str, Any]]:
+        max_total_tokens: int = MAX_GAP_ANALYSIS_TOKENS,
+        shard_tokens: int = GAP_ANALYSIS_SHARD_TOKENS,
+        shard_prefix: str = "",
+        shard_suffix: str = ""
+    ) -> Tuple[List[str], Dict[str, Any]]:
         """
         Prepare multiple documents for Knowledge Gap analysis with token budgeting.
 
@@ -228,23 +376,26 @@ Respond in JSON format:
         Falls back gracefully when summaries don't exist.
         Implements smart sampling if over budget.
 
+        The included documents are split into shards of at most shard_tokens
+        so each shard can be analyzed by its own LLM call. Each shard is
+        written between shard_prefix and shard_suffix in the same buffer, so
+        a prompt template wrapped around it costs no extra full-size copy.
+
         Args:
-            documents: List of Document instances
-            max_total_chars: Maximum total characters to include
-            prioritize_recent: Prioritize more recent documents
+            documents: List of Document instances, most recent first
+                (the caller's query orders by source_created_at)
+            max_total_tokens: Maximum total tokens to include
+            shard_tokens: Maximum tokens per shard
+            shard_prefix: Text written before each shard's documents
+            shard_suffix: Text written after each shard's documents
 
         Returns:
-            (combined_text, stats_dict)
+            (shard_texts, stats_dict)
         """
-        # Sort by date (recent first) if prioritizing
-        if prioritize_recent:
-            documents = sorted(
-                documents,
-                key=lambda d: d.source_created_at or datetime.min.replace(tzinfo=timezone.utc),
-                reverse=True
-            )
-
-        doc_texts = []
+        shards = []
+        buf = io.StringIO()
+        shard_used = 0
+        total_tokens = 0
         total_chars = 0
         stats = {
             "total_documents": len(documents),
@@ -257,7 +408,7 @@ Respond in JSON format:
 
         for doc in documents:
             # Check if we have room for another document
-            if total_chars >= max_total_chars:
+            if total_tokens >= max_total_tokens:
                 stats["documents_skipped"] = len(documents) - stats["documents_included"]
                 logger.warning(
                     f"[KnowledgeGap] Token budget reached. Included {stats['documents_included']}/{len(documents)} docs"
@@ -272,18 +423,36 @@ Respond in JSON format:
                 max_content_chars=4000  # Fallback limit per doc
             )
 
+            doc_tokens = self._document_tokens(doc, doc_text, 4000)
+
             # Check if adding this doc exceeds budget
-            if total_chars + len(doc_text) > max_total_chars:
+            if total_tokens + doc_tokens > max_total_tokens:
                 # Try with smaller content limit
                 doc_text = self._prepare_document_for_analysis(
                     doc,
                     use_summary=True,
                     max_content_chars=2000
                 )
-                if total_chars + len(doc_text) > max_total_chars:
+                doc_tokens = self._document_tokens(doc, doc_text, 2000)
+                if total_tokens + doc_tokens > max_total_tokens:
                     continue  # Skip this doc
 
-            doc_texts.append(doc_text)
+            # Start a new shard when this doc doesn't fit the current one
+            if shard_used and shard_used + doc_tokens > shard_tokens:
+                buf.write(shard_suffix)
+                shards.append(buf.getvalue())
+                buf = io.StringIO()
+                shard_used = 0
+
+            # Write straight into the buffer so we never hold a list of
+            # per-doc strings alongside the joined result
+            if shard_used:
+                buf.write("\n")
+            else:
+                buf.write(shard_prefix)
+            buf.write(doc_text)
+            shard_used += doc_tokens
+            total_tokens += doc_tokens
             total_chars += len(doc_text)
             stats["documents_included"] += 1
 
@@ -292,8 +461,13 @@ Respond in JSON format:
             else:
                 stats["documents_with_fallback"] += 1
 
+        if shard_used:
+            buf.write(shard_suffix)
+            shards.append(buf.getvalue())
+
         stats["total_chars"] = total_chars
-        stats["estimated_tokens"] = total_chars // 4
+        stats["total_tokens"] = total_tokens
+        stats["shards"] = len(shards)
 
         # Log stats
         logger.info(f"[KnowledgeGap] Document preparation stats:")
@@ -302,38 +476,287 @@ Respond in JSON format:
         logger.info(f"  - With summary: {stats['documents_with_summary']}")
         logger.info(f"  - With fallback (raw): {stats['documents_with_fallback']}")
         logger.info(f"  - Skipped (budget): {stats['documents_skipped']}")
-        logger.info(f"  - Total chars: {stats['total_chars']} (~{stats['estimated_tokens']} tokens)")
+        logger.info(f"  - Total chars: {stats['total_chars']} ({stats['total_tokens']} tokens)")
+        logger.info(f"  - Shards: {stats['shards']}")
+
+        return shards, stats
+
+    @staticmethod
+    def _document_tokens(doc: Document, doc_text: str, max_content_chars: int) -> int:
+        """
+        Token count of a prepared document, cached across analyses.
+
+        The prepared text only changes when the document does, so the count
+        is keyed by id, updated_at and the content limit it was built with.
+        """
+        key = (doc.id, doc.updated_at, max_content_chars)
+        tokens = _DOC_TOKEN_CACHE.get(key)
+        if tokens is None:
+            tokens = count_tokens(doc_text)
+            _DOC_TOKEN_CACHE.set(key, tokens)
+        return tokens
+
+    @staticmethod
+    def _condensed_summary(doc: Document) -> str:
+        """
+        Condense a document's structured summary for the intelligent detector.
+
+        Cached across analyses by id and updated_at, which changes whenever
+        the summary is rewritten.
+        """
+        key = (doc.id, doc.updated_at)
+        content = _SUMMARY_CONTENT_CACHE.get(key)
+        if content is None:
+            get = doc.structured_summary.get
+            content_parts = [f"Summary: {get('summary', '')}"]
+            append = content_parts.append
+
+            for field_key, sep, label, limit in INTELLIGENT_SUMMARY_FIELDS:
+                values = get(field_key)
+                if values:
+                    append(f"{label}: {sep.join(values[:limit])}")
+
+            content = "\n".join(content_parts)
+            _SUMMARY_CONTENT_CACHE.set(key, content)
+        return content
+
+    def _analyze_gap_shard(self, prompt: str) -> List[Dict]:
+        """
+        Run the single-pass gap analysis prompt for one document shard.
+
+        Args:
+            prompt: GAP_ANALYSIS_PROMPT already rendered around the shard
+
+        Returns:
+            Raw gap dicts as produced by the LLM
+        """
+        response = self.client.chat_completion(
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are a knowledge management expert. Analyze documents to identify gaps in organizational knowledge. Always respond with valid JSON."
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            temperature=0.3,
+            max_tokens=4000,  # Increased from 2000 to handle more comprehensive analysis
+            response_format={"type": "json_object"}
+        )
+
+        result_data = json.loads(response.choices[0].message.content)
+        return result_data.get("gaps", [])
+
+    def _merge_shard_gaps(self, shard_gaps: List[List[Dict]]) -> List[Dict]:
+        """
+        Merge gaps from several shards, dropping near-duplicates.
+
+        Candidates are visited highest priority first, so when two shards
+        report the same gap the more important one is kept.
+        """
+        candidates = [gap_data for gaps in shard_gaps for gap_data in gaps]
+        if len(shard_gaps) < 2 or len(candidates) < 2:
+            return candidates
 
-        return "\n".join(doc_texts), stats
+        candidates.sort(key=_gap_priority, reverse=True)
+        similarity = self._gap_title_similarity([
+            (g.get("title") or "").strip() or "Unknown Gap" for g in candidates
+        ])
+
+        kept = [0]
+        for i in range(1, len(candidates)):
+            if similarity[i, kept].max() < GAP_TITLE_SIMILARITY:
+                kept.append(i)
+
+        logger.info(f"[KnowledgeGap] Merged {len(candidates)} shard gaps into {len(kept)}")
+        return [candidates[i] for i in kept]
+
+    def _gap_title_similarity(self, titles: List[str]) -> np.ndarray:
+        """
+        Pairwise cosine similarity matrix of gap titles.
+
+        Embeds all titles in one request. Falls back to difflib ratios if the
+        embedding call fails, so a flaky embedding endpoint never loses gaps.
+        """
+        try:
+            response = self.client.create_embedding(text=titles, dimensions=1536)
+            embeddings = np.array([e.embedding for e in response.data], dtype=np.float32)
+            embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-12
+            return embeddings @ embeddings.T
+        except Exception as e:
+            logger.warning(f"[KnowledgeGap] Title embedding failed, using string similarity: {e}")
+            lowered = [t.lower() for t in titles]
+            return np.array([
+                [SequenceMatcher(None, a, b).ratio() for b in lowered]
+                for a in lowered
+            ], dtype=np.float32)
+
+    def _insert_gaps(self, gap_rows: List[Dict[str, Any]]) -> None:
+        """
+        Insert knowledge gap rows in a single batched INSERT.
+
+        Rows are plain column dicts with ids assigned up front, so the batch
+        skips per-instance ORM bookkeeping and the caller can build its
+        response without reading anything back. Going through the Core table
+        rather than the mapped class runs as one executemany without the ORM
+        bulk-insert layer. The whole batch shares one timestamp instead of
+        evaluating the column defaults per row.
+        """
+        if gap_rows:
+            now = utc_now()
+            for row in gap_rows:
+                row["created_at"] = row["updated_at"] = now
+            self.db.execute(KnowledgeGap.__table__.insert(), gap_rows)
+
+    @staticmethod
+    def _gap_analysis_result(gap_rows: List[Dict[str, Any]], documents_analyzed: int) -> GapAnalysisResult:
+        """
+        Build the analysis response from inserted gap rows.
+
+        The response entries and category counts come out of one pass.
+        """
+        gaps = []
+        category_counts = Counter()
+        for g in gap_rows:
+            category = g["category"].value
+            category_counts[category] += 1
+            gaps.append({
+                "id": g["id"],
+                "title": g["title"],
+                "category": category,
+                "priority": g["priority"],
+                "questions_count": len(g["questions"])
+            })
+        return GapAnalysisResult(
+            gaps=gaps,
+            total_documents_analyzed=documents_analyzed,
+            categories_found=dict(category_counts)
+        )
+
+    # ========================================================================
+    # ANALYSIS RESULT CACHE
+    # ========================================================================
+
+    @staticmethod
+    def _corpus_fingerprint(documents: List[Document]) -> str:
+        """
+        Fingerprint a set of documents by id and last update time.
+
+        Any added, removed or edited document changes the fingerprint.
+        """
+        return KnowledgeService._fingerprint_stamps(
+            (doc.id, doc.updated_at or doc.created_at) for doc in documents
+        )
+
+    @staticmethod
+    def _fingerprint_stamps(stamps) -> str:
+        """Fingerprint (doc id, last update time) pairs, in any order"""
+        hasher = hashlib.blake2b(digest_size=16)
+        for doc_id, stamp in sorted(stamps, key=lambda s: s[0]):
+            hasher.update(f"{doc_id}:{stamp.timestamp() if stamp else 0}\n".encode())
+        return hasher.hexdigest()
+
+    def _get_cached_gap_analysis(
+        self,
+        tenant_id: str,
+        project_id: Optional[str],
+        mode: str,
+        fingerprint: str
+    ) -> Optional[GapAnalysisResult]:
+        """
+        Return the last analysis result if it ran over the same documents
+        and every gap it created still exists and is open. Once any of them
+        is answered, closed or deleted the analysis runs again.
+        """
+        entry = self.db.query(GapAnalysisCache).filter(
+            GapAnalysisCache.tenant_id == tenant_id,
+            GapAnalysisCache.mode == mode,
+            GapAnalysisCache.project_key == (project_id or '*')
+        ).first()
+        if not entry or entry.fingerprint != fingerprint:
+            return None
+
+        gap_ids = {gap["id"] for gap in entry.result.get("gaps", [])}
+        if not gap_ids:
+            return None
+        open_gaps = self.db.query(func.count(KnowledgeGap.id)).filter(
+            KnowledgeGap.id.in_(gap_ids),
+            KnowledgeGap.tenant_id == tenant_id,
+            KnowledgeGap.status == GapStatus.OPEN
+        ).scalar()
+        if open_gaps != len(gap_ids):
+            return None
+
+        logger.info(
+            f"[KnowledgeGap] Documents unchanged since {entry.analyzed_at}, "
+            f"reusing last {mode} analysis for tenant {tenant_id}"
+        )
+        return GapAnalysisResult(**entry.result)
+
+    def _remember_gap_analysis(
+        self,
+        tenant_id: str,
+        project_id: Optional[str],
+        mode: str,
+        fingerprint: str,
+        result: GapAnalysisResult
+    ) -> None:
+        """
+        Record an analysis result against its corpus fingerprint.
+
+        Runs inside the caller's transaction, so it only sticks if the gaps
+        themselves are committed. Runs that produced no gaps aren't
+        recorded, so the next request analyzes again.
+        """
+        if not result.gaps:
+            return
+
+        key = {"tenant_id": tenant_id, "mode": mode, "project_key": project_id or '*'}
+        values = {
+            "fingerprint": fingerprint,
+            "result": asdict(result),
+            "analyzed_at": utc_now()
+        }
+        # One UPDATE replaces the entry for this key in place
+        updated = self.db.query(GapAnalysisCache).filter_by(**key).update(
+            values, synchronize_session=False
+        )
+        if updated:
+            return
+
+        try:
+            with self.db.begin_nested():
+                self.db.add(GapAnalysisCache(**key, **values))
+        except IntegrityError:
+            # A concurrent analysis recorded this key first; keep its entry
+            # rather than failing the caller's transaction
+            pass
 
     # ========================================================================
     # KNOWLEDGE GAP ANALYSIS
     # ========================================================================
 
-    def analyze_gaps(
+    def _work_documents_query(
         self,
         tenant_id: str,
         project_id: Optional[str] = None,
-        force_reanalyze: bool = False,
         include_pending: bool = True
-    ) -> GapAnalysisResult:
+    ):
         """
-        Analyze documents to identify knowledge gaps.
+        Base query for the work documents a gap analysis runs over.
 
         Args:
             tenant_id: Tenant ID
-            project_id: Optional project to analyze (None = all)
-            force_reanalyze: Re-analyze even if gaps exist
-            include_pending: Include pending/classified documents (not just confirmed)
+            project_id: Optional project to restrict to
+            include_pending: Also include classified and not-yet-classified
+                documents, so analysis works on freshly synced data. When
+                False, only confirmed work documents are included.
 
         Returns:
-            GapAnalysisResult with identified gaps
+            Filtered Document query (unordered, unlimited)
         """
-        from sqlalchemy import or_
-
-        # Get work documents - include CONFIRMED, CLASSIFIED, and optionally PENDING
-        # This allows gap analysis to work on newly synced documents that haven't
-        # been fully confirmed yet
         if include_pending:
             # Include all documents that are classified as WORK (or not yet classified)
             # and are in PENDING, CLASSIFIED, or CONFIRMED status
@@ -367,7 +790,45 @@ Respond in JSON format:
         if project_id:
             query = query.filter(Document.project_id == project_id)
 
-        documents = query.limit(200).all()  # Increased limit - token budgeting handles the rest
+        return query
+
+    def analyze_gaps(
+        self,
+        tenant_id: str,
+        project_id: Optional[str] = None,
+        force_reanalyze: bool = False,
+        include_pending: bool = True
+    ) -> GapAnalysisResult:
+        """
+        Analyze documents to identify knowledge gaps.
+
+        Args:
+            tenant_id: Tenant ID
+            project_id: Optional project to analyze (None = all)
+            force_reanalyze: Re-analyze even if the documents are unchanged since the last run
+            include_pending: Include pending/classified documents (not just confirmed)
+
+        Returns:
+            GapAnalysisResult with identified gaps
+        """
+        # Get work documents - include CONFIRMED, CLASSIFIED, and optionally PENDING
+        # This allows gap analysis to work on newly synced documents that haven't
+        # been fully confirmed yet
+        query = self._work_documents_query(tenant_id, project_id, include_pending)
+
+        # Cheap EXISTS probe first: tenants with no work documents yet (e.g.
+        # mid first sync) skip hydrating up to 200 full Document rows
+        if not self.db.query(query.exists()).scalar():
+            return GapAnalysisResult(
+                gaps=[],
+                total_documents_analyzed=0,
+                categories_found={}
+            )
+
+        # Most recent first, so the token budget keeps the freshest documents
+        documents = query.order_by(
+            Document.source_created_at.desc().nullslast()
+        ).limit(200).all()  # Increased limit - token budgeting handles the rest
 
         if not documents:
             return GapAnalysisResult(
@@ -376,94 +837,72 @@ Respond in JSON format:
                 categories_found={}
             )
 
+        corpus_fingerprint = self._corpus_fingerprint(documents)
+        if not force_reanalyze:
+            cached = self._get_cached_gap_analysis(tenant_id, project_id, "simple", corpus_fingerprint)
+            if cached:
+                return cached
+
         # Build document text using structured summaries (Phase 3 improvement)
         # Uses pre-extracted summaries from Phase 2 when available
         # Falls back to truncated content for docs without summaries
         # Implements token budgeting to prevent API failures
-        combined_text, prep_stats = self._prepare_documents_for_analysis(
+        prompts, prep_stats = self._prepare_documents_for_analysis(
             documents,
-            max_total_chars=MAX_GAP_ANALYSIS_CHARS,
-            prioritize_recent=True
+            max_total_tokens=MAX_GAP_ANALYSIS_TOKENS,
+            shard_prefix=self.GAP_ANALYSIS_PROMPT_PREFIX,
+            shard_suffix=self.GAP_ANALYSIS_PROMPT_SUFFIX
         )
 
-        # Call GPT-4 for analysis
-        try:
-            response = self.client.chat_completion(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a knowledge management expert. Analyze documents to identify gaps in organizational knowledge. Always respond with valid JSON."
-                    },
-                    {
-                        "role": "user",
-                        "content": self.GAP_ANALYSIS_PROMPT.format(documents=combined_text)
-                    }
-                ],
-                temperature=0.3,
-                max_tokens=4000,  # Increased from 2000 to handle more comprehensive analysis
-                response_format={"type": "json_object"}
+        if not prompts:
+            return GapAnalysisResult(
+                gaps=[],
+                total_documents_analyzed=0,
+                categories_found={}
             )
 
-            result_text = response.choices[0].message.content
-            result_data = json.loads(result_text)
+        # Call GPT-4 for analysis, one concurrent call per shard
+        try:
+            with ThreadPoolExecutor(
+                max_workers=min(GAP_ANALYSIS_PARALLEL_SHARDS, len(prompts))
+            ) as executor:
+                shard_gaps = list(executor.map(self._analyze_gap_shard, prompts))
 
-            gaps_data = result_data.get("gaps", [])
+            gaps_data = self._merge_shard_gaps(shard_gaps)
 
             # Save gaps to database
-            category_counts = {}
             saved_gaps = []
 
             for gap_data in gaps_data:
                 category_str = gap_data.get("category", "context").lower()
-                category_map = {
-                    "decision": GapCategory.DECISION,
-                    "technical": GapCategory.TECHNICAL,
-                    "process": GapCategory.PROCESS,
-                    "context": GapCategory.CONTEXT,
-                    "relationship": GapCategory.RELATIONSHIP,
-                    "timeline": GapCategory.TIMELINE,
-                    "outcome": GapCategory.OUTCOME,
-                    "rationale": GapCategory.RATIONALE
-                }
-                category = category_map.get(category_str, GapCategory.CONTEXT)
-
-                # Track category counts
-                category_counts[category.value] = category_counts.get(category.value, 0) + 1
-
-                # Create gap
-                gap = KnowledgeGap(
-                    tenant_id=tenant_id,
-                    project_id=project_id,
-                    title=gap_data.get("title", "Unknown Gap"),
-                    description=gap_data.get("description", ""),
-                    category=category,
-                    priority=min(max(gap_data.get("priority", 3), 1), 5),
-                    status=GapStatus.OPEN,
-                    questions=[
+                category = GAP_CATEGORY_MAP.get(category_str, GapCategory.CONTEXT)
+
+                # Queue gap row for the batched insert
+                saved_gaps.append({
+                    "id": generate_uuid(),
+                    "tenant_id": tenant_id,
+                    "project_id": project_id,
+                    "title": gap_data.get("title", "Unknown Gap"),
+                    "description": gap_data.get("description", ""),
+                    "category": category,
+                    "priority": _gap_priority(gap_data),
+                    "status": GapStatus.OPEN,
+                    "questions": [
                         {"text": q, "answered": False}
                         for q in gap_data.get("questions", [])
                     ],
-                    context={
+                    "context": {
                         "related_topics": gap_data.get("related_topics", []),
                         "analyzed_documents": [doc.id for doc in documents[:10]]
                     }
-                )
-                self.db.add(gap)
-                saved_gaps.append(gap)
+                })
 
+            self._insert_gaps(saved_gaps)
+            analysis = self._gap_analysis_result(saved_gaps, len(documents))
+            self._remember_gap_analysis(tenant_id, project_id, "simple", corpus_fingerprint, analysis)
             self.db.commit()
 
-            return GapAnalysisResult(
-                gaps=[{
-                    "id": g.id,
-                    "title": g.title,
-                    "category": g.category.value,
-                    "priority": g.priority,
-                    "questions_count": len(g.questions)
-                } for g in saved_gaps],
-                total_documents_analyzed=len(documents),
-                categories_found=category_counts
-            )
+            return analysis
 
         except Exception as e:
             self.db.rollback()
@@ -494,108 +933,48 @@ Respond in JSON format:
         Args:
             tenant_id: Tenant ID
             project_id: Optional project to analyze (None = all)
-            force_reanalyze: Re-analyze even if gaps exist
+            force_reanalyze: Re-analyze even if the documents are unchanged since the last run
             include_pending: Include pending/classified documents
             max_documents: Maximum documents to analyze (for cost control)
 
         Returns:
             GapAnalysisResult with identified gaps
         """
-        from sqlalchemy import or_
-
         logger.info(f"Starting multi-stage gap analysis for tenant {tenant_id}")
 
         # Get work documents - include CONFIRMED, CLASSIFIED, and optionally PENDING
-        if include_pending:
-            query = self.db.query(Document).filter(
-                Document.tenant_id == tenant_id,
-                Document.is_deleted == False,
-                or_(
-                    and_(
-                        Document.status == DocumentStatus.CONFIRMED,
-                        Document.classification == DocumentClassification.WORK
-                    ),
-                    and_(
-                        Document.status == DocumentStatus.CLASSIFIED,
-                        Document.classification == DocumentClassification.WORK
-                    ),
-                    Document.status == DocumentStatus.PENDING
-                )
-            )
-        else:
-            query = self.db.query(Document).filter(
-                Document.tenant_id == tenant_id,
-                Document.status == DocumentStatus.CONFIRMED,
-                Document.classification == DocumentClassification.WORK,
-                Document.is_deleted == False
-            )
-
-        if project_id:
-            query = query.filter(Document.project_id == project_id)
-
-        # Get documents with limit
-        documents = query.limit(max_documents).all()
-
-        if not documents:
-            logger.warning(f"No documents found for tenant {tenant_id}")
-            return GapAnalysisResult(
-                gaps=[],
-                total_documents_analyzed=0,
-                categories_found={}
-            )
+        query = self._work_documents_query(tenant_id, project_id, include_pending)
 
-        logger.info(f"Found {len(documents)} documents for analysis")
+        # Stream documents (most recent first), joining in the project so the
+        # loop below doesn't query it per document. Each ORM instance can be
+        # released once its context is built.
+        documents = query.options(joinedload(Document.project)).order_by(
+            Document.source_created_at.desc().nullslast()
+        ).limit(max_documents).yield_per(25)
 
         # Convert to DocumentContext objects
         # Use structured summaries (Phase 3) when available for efficient token usage
         doc_contexts = []
+        doc_stamps = []
         docs_with_summary = 0
         docs_with_fallback = 0
 
         for doc in documents:
+            doc_stamps.append((doc.id, doc.updated_at or doc.created_at))
+
             # Get project name if available
-            project_name = None
-            if doc.project_id:
-                project = self.db.query(Project).filter(
-                    Project.id == doc.project_id
-                ).first()
-                if project:
-                    project_name = project.name
+            project_name = doc.project.name if doc.project else None
 
             # Use structured summary content if available (more efficient)
+            content = self._prepare_document_for_analysis(
+                doc,
+                use_summary=True,
+                max_content_chars=8000,
+                include_header=False
+            )
             if doc.structured_summary:
-                summary = doc.structured_summary
-                # Build condensed content from structured summary
-                content_parts = []
-                content_parts.append(f"Summary: {summary.get('summary', '')}")
-
-                if summary.get('key_topics'):
-                    content_parts.append(f"Topics: {', '.join(summary['key_topics'])}")
-
-                entities = summary.get('entities', {})
-                if entities.get('people'):
-                    content_parts.append(f"People: {', '.join(entities['people'])}")
-                if entities.get('systems'):
-                    content_parts.append(f"Systems: {', '.join(entities['systems'])}")
-                if entities.get('organizations'):
-                    content_parts.append(f"Organizations: {', '.join(entities['organizations'])}")
-
-                if summary.get('decisions'):
-                    content_parts.append(f"Decisions: {'; '.join(summary['decisions'])}")
-                if summary.get('processes'):
-                    content_parts.append(f"Processes: {'; '.join(summary['processes'])}")
-                if summary.get('action_items'):
-                    content_parts.append(f"Actions: {'; '.join(summary['action_items'][:5])}")
-                if summary.get('technical_details'):
-                    content_parts.append(f"Technical: {'; '.join(summary['technical_details'][:3])}")
-
-                content = "\n".join(content_parts)
                 docs_with_summary += 1
             else:
-                # Fallback: truncated raw content
-                content = (doc.content or "")[:8000]  # Limit per doc
-                if doc.content and len(doc.content) > 8000:
-                    content += f"\n[... truncated, {len(doc.content)} total chars]"
                 docs_with_fallback += 1
 
             doc_contexts.append(DocumentContext(
@@ -608,78 +987,69 @@ Respond in JSON format:
                 project_name=project_name
             ))
 
+        if not doc_contexts:
+            logger.warning(f"No documents found for tenant {tenant_id}")
+            return GapAnalysisResult(
+                gaps=[],
+                total_documents_analyzed=0,
+                categories_found={}
+            )
+
+        logger.info(f"Found {len(doc_contexts)} documents for analysis")
+
+        corpus_fingerprint = self._fingerprint_stamps(doc_stamps)
+        if not force_reanalyze:
+            cached = self._get_cached_gap_analysis(tenant_id, project_id, "multistage", corpus_fingerprint)
+            if cached:
+                return cached
+
         logger.info(f"[MultiStage] Docs with summary: {docs_with_summary}, with fallback: {docs_with_fallback}")
 
         try:
             # Run multi-stage analysis
-            analyzer = MultiStageGapAnalyzer(client=self.client)
+            analyzer = get_multistage_gap_analyzer()
             result = analyzer.analyze(
                 documents=doc_contexts,
                 max_docs_per_stage=min(30, len(doc_contexts)),
                 temperature=0.4
             )
 
-            # Convert to knowledge gaps
-            gaps_data = analyzer.to_knowledge_gaps(result, project_id)
-
-            # Save gaps to database
-            category_counts = {}
+            # Save gaps to database, converting them as they are queued
             saved_gaps = []
 
-            for gap_data in gaps_data:
+            for gap_data in analyzer.iter_knowledge_gaps(result, project_id):
                 category_str = gap_data.get("category", "context").lower()
-                category_map = {
-                    "decision": GapCategory.DECISION,
-                    "technical": GapCategory.TECHNICAL,
-                    "process": GapCategory.PROCESS,
-                    "context": GapCategory.CONTEXT,
-                    "relationship": GapCategory.RELATIONSHIP,
-                    "timeline": GapCategory.TIMELINE,
-                    "outcome": GapCategory.OUTCOME,
-                    "rationale": GapCategory.RATIONALE
-                }
-                category = category_map.get(category_str, GapCategory.CONTEXT)
-
-                # Track category counts
-                category_counts[category.value] = category_counts.get(category.value, 0) + 1
-
-                # Create gap
-                gap = KnowledgeGap(
-                    tenant_id=tenant_id,
-                    project_id=project_id,
-                    title=gap_data.get("title", "Unknown Gap"),
-                    description=gap_data.get("description", ""),
-                    category=category,
-                    priority=min(max(gap_data.get("priority", 3), 1), 5),
-                    status=GapStatus.OPEN,
-                    questions=gap_data.get("questions", []),
-                    context=gap_data.get("context", {})
-                )
-                self.db.add(gap)
-                saved_gaps.append(gap)
+                category = GAP_CATEGORY_MAP.get(category_str, GapCategory.CONTEXT)
+
+                # Queue gap row for the batched insert
+                saved_gaps.append({
+                    "id": generate_uuid(),
+                    "tenant_id": tenant_id,
+                    "project_id": project_id,
+                    "title": gap_data.get("title", "Unknown Gap"),
+                    "description": gap_data.get("description", ""),
+                    "category": category,
+                    "priority": min(max(gap_data.get("priority", 3), 1), 5),
+                    "status": GapStatus.OPEN,
+                    "questions": gap_data.get("questions", []),
+                    "context": gap_data.get("context", {})
+                })
 
+            self._insert_gaps(saved_gaps)
+            analysis = self._gap_analysis_result(saved_gaps, len(doc_contexts))
+            self._remember_gap_analysis(tenant_id, project_id, "multistage", corpus_fingerprint, analysis)
             self.db.commit()
 
             logger.info(f"Multi-stage analysis complete: {len(saved_gaps)} gaps created")
 
-            return GapAnalysisResult(
-                gaps=[{
-                    "id": g.id,
-                    "title": g.title,
-                    "category": g.category.value,
-                    "priority": g.priority,
-                    "questions_count": len(g.questions)
-                } for g in saved_gaps],
-                total_documents_analyzed=len(documents),
-                categories_found=category_counts
-            )
+            return analysis
 
         except Exception as e:
             self.db.rollback()
             logger.error(f"Multi-stage analysis failed: {e}")
             return GapAnalysisResult(
                 gaps=[],
-                total_documents_analyzed=len(documents),
+                total_documents_analyzed=len(doc_contexts),
                 categories_found={"error": str(e)}
             )
 
@@ -706,121 +1076,42 @@ Respond in JSON format:
         Args:
             tenant_id: Tenant ID
             project_id: Optional project to analyze (None = all)
-            force_reanalyze: Re-analyze even if gaps exist
+            force_reanalyze: Re-analyze even if the documents are unchanged since the last run
             include_pending: Include pending/classified documents
             max_documents: Maximum documents to analyze (for cost control)
 
         Returns:
             GapAnalysisResult with identified gaps
         """
-        from sqlalchemy import or_
-
         logger.info(f"Starting goal-first gap analysis for tenant {tenant_id}")
 
         # Get work documents
-        if include_pending:
-            query = self.db.query(Document).filter(
-                Document.tenant_id == tenant_id,
-                Document.is_deleted == False,
-                or_(
-                    and_(
-                        Document.status == DocumentStatus.CONFIRMED,
-                        Document.classification == DocumentClassification.WORK
-                    ),
-                    and_(
-                        Document.status == DocumentStatus.CLASSIFIED,
-                        Document.classification == DocumentClassification.WORK
-                    ),
-                    Document.status == DocumentStatus.PENDING
-                )
-            )
-        else:
-            query = self.db.query(Document).filter(
-                Document.tenant_id == tenant_id,
-                Document.status == DocumentStatus.CONFIRMED,
-                Document.classification == DocumentClassification.WORK,
-                Document.is_deleted == False
-            )
-
-        if project_id:
-            query = query.filter(Document.project_id == project_id)
-
-        documents = query.limit(max_documents).all()
-
-        if not documents:
-            logger.warning(f"No documents found for tenant {tenant_id}")
-            return GapAnalysisResult(
-                gaps=[],
-                total_documents_analyzed=0,
-                categories_found={}
-            )
+        query = self._work_documents_query(tenant_id, project_id, include_pending)
 
-        logger.info(f"Found {len(documents)} documents for goal-first analysis")
+        # Stream documents (most recent first) with their project joined in
+        documents = query.options(joinedload(Document.project)).order_by(
+            Document.source_created_at.desc().nullslast()
+        ).limit(max_documents).yield_per(25)
 
         # Convert to DocumentContext objects for goal-first analyzer
         # Use structured summaries (Phase 3) when available for efficient token usage
         doc_contexts = []
+        doc_stamps = []
         docs_with_summary = 0
-        docs_with_content = 0
-        docs_without_content = 0
-        total_content_chars = 0
 
         for doc in documents:
-            project_name = None
-            if doc.project_id:
-                project = self.db.query(Project).filter(
-                    Project.id == doc.project_id
-                ).first()
-                if project:
-                    project_name = project.name
+            doc_stamps.append((doc.id, doc.updated_at or doc.created_at))
+            project_name = doc.project.name if doc.project else None
 
             # Use structured summary content if available (Phase 3 improvement)
+            content = self._prepare_document_for_analysis(
+                doc,
+                use_summary=True,
+                max_content_chars=8000,
+                include_header=False
+            )
             if doc.structured_summary:
-                summary = doc.structured_summary
-                # Build condensed content from structured summary
-                content_parts = []
-                content_parts.append(f"Summary: {summary.get('summary', '')}")
-
-                if summary.get('key_topics'):
-                    content_parts.append(f"Topics: {', '.join(summary['key_topics'])}")
-
-                entities = summary.get('entities', {})
-                if entities.get('people'):
-                    content_parts.append(f"People: {', '.join(entities['people'])}")
-                if entities.get('systems'):
-                    content_parts.append(f"Systems: {', '.join(entities['systems'])}")
-                if entities.get('organizations'):
-                    content_parts.append(f"Organizations: {', '.join(entities['organizations'])}")
-
-                if summary.get('decisions'):
-                    content_parts.append(f"Decisions: {'; '.join(summary['decisions'])}")
-                if summary.get('processes'):
-                    content_parts.append(f"Processes: {'; '.join(summary['processes'])}")
-                if summary.get('action_items'):
-                    content_parts.append(f"Actions: {'; '.join(summary['action_items'][:5])}")
-                if summary.get('technical_details'):
-                    content_parts.append(f"Technical: {'; '.join(summary['technical_details'][:3])}")
-
-                content = "\n".join(content_parts)
-                content_len = len(content)
                 docs_with_summary += 1
-                docs_with_content += 1
-                total_content_chars += content_len
-            else:
-                # Fallback: truncated raw content
-                raw_content = doc.content or ""
-                content_len = len(raw_content)
-
-                if content_len > 0:
-                    # Truncate to prevent token bomb
-                    content = raw_content[:8000]
-                    if content_len > 8000:
-                        content += f"\n[... truncated, {content_len} total chars]"
-                    docs_with_content += 1
-                    total_content_chars += min(content_len, 8000)
-                else:
-                    content = ""
-                    docs_without_content += 1
 
             doc_contexts.append(GFDocumentContext(
                 id=doc.id,
@@ -832,6 +1123,29 @@ Respond in JSON format:
                 project_name=project_name
             ))
 
+        if not doc_contexts:
+            logger.warning(f"No documents found for tenant {tenant_id}")
+            return GapAnalysisResult(
+                gaps=[],
+                total_documents_analyzed=0,
+                categories_found={}
+            )
+
+        logger.info(f"Found {len(doc_contexts)} documents for goal-first analysis")
+
+        corpus_fingerprint = self._fingerprint_stamps(doc_stamps)
+        if not force_reanalyze:
+            cached = self._get_cached_gap_analysis(tenant_id, project_id, "goalfirst", corpus_fingerprint)
+            if cached:
+                return cached
+
+        content_lengths = np.fromiter(
+            (len(dc.content) for dc in doc_contexts), dtype=np.int64, count=len(doc_contexts)
+        )
+        docs_with_content = int(np.count_nonzero(content_lengths))
+        docs_without_content = len(doc_contexts) - docs_with_content
+        total_content_chars = int(content_lengths.sum())
+
         # Log content statistics
         logger.info(f"[GoalFirst] Document content stats:")
         logger.info(f"  - Documents with SUMMARY: {docs_with_summary}")
@@ -839,14 +1153,14 @@ Respond in JSON format:
         logger.info(f"  - Documents WITHOUT content: {docs_without_content}")
         logger.info(f"  - Total content characters: {total_content_chars}")
 
-        if docs_without_content == len(documents):
+        if docs_without_content == len(doc_contexts):
             logger.warning("[GoalFirst] WARNING: ALL documents have ZERO content!")
             logger.warning("[GoalFirst] Content extraction likely failed - check Box sync permissions")
             logger.warning("[GoalFirst] Analysis will produce generic/irrelevant questions without document content")
 
         try:
             # Run goal-first analysis
-            analyzer = GoalFirstGapAnalyzer(client=self.client)
+            analyzer = get_goal_first_analyzer()
             result = analyzer.analyze(
                 documents=doc_contexts,
                 max_docs_per_stage=min(30, len(doc_contexts)),
@@ -857,60 +1171,40 @@ Respond in JSON format:
             gaps_data = analyzer.to_knowledge_gaps(result, project_id)
 
             # Save gaps to database
-            category_counts = {}
             saved_gaps = []
 
             for gap_data in gaps_data:
                 category_str = gap_data.get("category", "context").lower()
-                category_map = {
-                    "strategic": GapCategory.DECISION,
-                    "decision": GapCategory.DECISION,
-                    "scope": GapCategory.CONTEXT,
-                    "timeline": GapCategory.TIMELINE,
-                    "financial": GapCategory.RATIONALE,
-                    "competition": GapCategory.DECISION,
-                    "context": GapCategory.CONTEXT
-                }
-                category = category_map.get(category_str, GapCategory.CONTEXT)
-
-                category_counts[category.value] = category_counts.get(category.value, 0) + 1
-
-                gap = KnowledgeGap(
-                    tenant_id=tenant_id,
-                    project_id=project_id,
-                    title=gap_data.get("title", "Unknown Gap"),
-                    description=gap_data.get("description", ""),
-                    category=category,
-                    priority=min(max(gap_data.get("priority", 3), 1), 5),
-                    status=GapStatus.OPEN,
-                    questions=gap_data.get("questions", []),
-                    context=gap_data.get("context", {})
-                )
-                self.db.add(gap)
-                saved_gaps.append(gap)
+                category = GOALFIRST_CATEGORY_MAP.get(category_str, GapCategory.CONTEXT)
+
+                saved_gaps.append({
+                    "id": generate_uuid(),
+                    "tenant_id": tenant_id,
+                    "project_id": project_id,
+                    "title": gap_data.get("title", "Unknown Gap"),
+                    "description": gap_data.get("description", ""),
+                    "category": category,
+                    "priority": min(max(gap_data.get("priority", 3), 1), 5),
+                    "status": GapStatus.OPEN,
+                    "questions": gap_data.get("questions", []),
+                    "context": gap_data.get("context", {})
+                })
 
+            self._insert_gaps(saved_gaps)
+            analysis = self._gap_analysis_result(saved_gaps, len(doc_contexts))
+            self._remember_gap_analysis(tenant_id, project_id, "goalfirst", corpus_fingerprint, analysis)
             self.db.commit()
 
             logger.info(f"Goal-first analysis complete: {len(saved_gaps)} gaps created")
 
-            return GapAnalysisResult(
-                gaps=[{
-                    "id": g.id,
-                    "title": g.title,
-                    "category": g.category.value,
-                    "priority": g.priority,
-                    "questions_count": len(g.questions)
-                } for g in saved_gaps],
-                total_documents_analyzed=len(documents),
-                categories_found=category_counts
-            )
+            return analysis
 
         except Exception as e:
             self.db.rollback()
             logger.error(f"Goal-first analysis failed: {e}")
             return GapAnalysisResult(
                 gaps=[],
-                total_documents_analyzed=len(documents),
+                total_documents_analyzed=len(doc_contexts),
                 categories_found={"error": str(e)}
             )
 
@@ -943,44 +1237,30 @@ Respond in JSON format:
         Args:
             tenant_id: Tenant ID
             project_id: Optional project to analyze (None = all)
-            force_reanalyze: Re-analyze even if gaps exist
+            force_reanalyze: Re-analyze even if the documents are unchanged since the last run
             include_pending: Include pending/classified documents
             max_documents: Maximum documents to analyze
 
         Returns:
             GapAnalysisResult with intelligent gaps
         """
-        from sqlalchemy import or_
-
         logger.info(f"Starting INTELLIGENT gap analysis for tenant {tenant_id}")
 
         # Get work documents
-        if include_pending:
-            query = self.db.query(Document).filter(
-                Document.tenant_id == tenant_id,
-                Document.is_deleted == False,
-                or_(
-                    and_(
-                        Document.status == DocumentStatus.CONFIRMED,
-                        Document.classification == DocumentClassification.WORK
-                    ),
-                    and_(
-                        Document.status == DocumentStatus.CLASSIFIED,
-                        Document.classification == DocumentClassification.WORK
-                    ),
-                    Document.status == DocumentStatus.PENDING
-                )
-            )
-        else:
-            query = self.db.query(Document).filter(
-                Document.tenant_id == tenant_id,
-                Document.status == DocumentStatus.CONFIRMED,
-                Document.classification == DocumentClassification.WORK,
-                Document.is_deleted == False
+        # Only the columns the detector reads, as plain rows rather than ORM
+        # instances, with content truncated in the database
+        query = self._work_documents_query(tenant_id, project_id, include_pending).with_entities(
+            Document.id, Document.title, Document.structured_summary,
+            func.substr(Document.content, 1, INTELLIGENT_CONTENT_CHARS).label("content"),
+            Document.created_at, Document.updated_at
+        ).filter(
+            # Skip documents the detector would discard for lack of content
+            or_(
+                func.length(Document.content) > 100,
+                # JSON columns store a None summary as JSON 'null', not SQL NULL
+                cast(Document.structured_summary, Text).notin_(["null", "{}"])
             )
-
-        if project_id:
-            query = query.filter(Document.project_id == project_id)
+        )
 
         documents = query.limit(max_documents).all()
 
@@ -994,6 +1274,12 @@ Respond in JSON format:
 
         logger.info(f"Found {len(documents)} documents for intelligent analysis")
 
+        corpus_fingerprint = self._corpus_fingerprint(documents)
+        if not force_reanalyze:
+            cached = self._get_cached_gap_analysis(tenant_id, project_id, "intelligent", corpus_fingerprint)
+            if cached:
+                return cached
+
         try:
             # Initialize intelligent gap detector
             detector = get_intelligent_gap_detector()
@@ -1003,29 +1289,14 @@ Respond in JSON format:
             for doc in documents:
                 # Get content - prefer structured summary, fallback to raw
                 if doc.structured_summary:
-                    summary = doc.structured_summary
-                    content_parts = []
-                    content_parts.append(f"Summary: {summary.get('summary', '')}")
-
-                    if summary.get('key_topics'):
-                        content_parts.append(f"Topics: {', '.join(summary['key_topics'])}")
-                    if summary.get('decisions'):
-                        content_parts.append(f"Decisions: {'; '.join(summary['decisions'])}")
-                    if summary.get('processes'):
-                        content_parts.append(f"Processes: {'; '.join(summary['processes'])}")
-                    if summary.get('action_items'):
-                        content_parts.append(f"Actions: {'; '.join(summary['action_items'][:5])}")
-                    if summary.get('technical_details'):
-                        content_parts.append(f"Technical: {'; '.join(summary['technical_details'][:3])}")
+                    content = self._condensed_summary(doc)
 
                     # Include raw content for better pattern matching
-                    raw_content = doc.content or ""
-                    if len(raw_content) > 0:
-                        content_parts.append(f"\nFull Content:\n{raw_content[:30000]}")
-
-                    content = "\n".join(content_parts)
+                    raw_content = doc.content
+                    if raw_content:
+                        content = f"{content}\n\nFull Content:\n{raw_content}"
                 else:
-                    content = (doc.content or "")[:30000]
+                    content = doc.content or ""
 
                 if len(content) > 100:
                     detector.add_document(
@@ -1044,43 +1315,32 @@ Respond in JSON format:
             gaps_data = detector.to_knowledge_gaps(result, project_id)
 
             # Save gaps to database
-            category_counts = {}
             saved_gaps = []
 
             for gap_data in gaps_data[:50]:  # Limit to top 50 gaps
                 category_str = gap_data.get("category", "context").lower()
-                category_map = {
-                    "decision": GapCategory.DECISION,
-                    "technical": GapCategory.TECHNICAL,
-                    "process": GapCategory.PROCESS,
-                    "context": GapCategory.CONTEXT,
-                    "relationship": GapCategory.RELATIONSHIP,
-                    "timeline": GapCategory.TIMELINE,
-                    "outcome": GapCategory.OUTCOME,
-                    "rationale": GapCategory.RATIONALE
-                }
-                category = category_map.get(category_str, GapCategory.CONTEXT)
-
-                category_counts[category.value] = category_counts.get(category.value, 0) + 1
-
-                gap = KnowledgeGap(
-                    tenant_id=tenant_id,
-                    project_id=project_id,
-                    title=gap_data.get("title", "Unknown Gap")[:200],
-                    description=gap_data.get("description", "")[:1000],
-                    category=category,
-                    priority=min(max(gap_data.get("priority", 3), 1), 5),
-                    status=GapStatus.OPEN,
-                    questions=gap_data.get("questions", []),
-                    context={
+                category = GAP_CATEGORY_MAP.get(category_str, GapCategory.CONTEXT)
+
+                saved_gaps.append({
+                    "id": generate_uuid(),
+                    "tenant_id": tenant_id,
+                    "project_id": project_id,
+                    "title": gap_data.get("title", "Unknown Gap")[:200],
+                    "description": gap_data.get("description", "")[:1000],
+                    "category": category,
+                    "priority": min(max(gap_data.get("priority", 3), 1), 5),
+                    "status": GapStatus.OPEN,
+                    "questions": gap_data.get("questions", []),
+                    "context": {
                         **gap_data.get("context", {}),
                         "analysis_type": "intelligent",
                         "stats": result.get("stats", {})
                     }
-                )
-                self.db.add(gap)
-                saved_gaps.append(gap)
+                })
 
+            self._insert_gaps(saved_gaps)
+            analysis = self._gap_analysis_result(saved_gaps, len(documents))
+            self._remember_gap_analysis(tenant_id, project_id, "intelligent", corpus_fingerprint, analysis)
             self.db.commit()
 
             # Log detailed stats
@@ -1092,17 +1352,7 @@ Respond in JSON format:
             logger.info(f"  - Contradictions found: {stats.get('contradictions', 0)}")
             logger.info(f"  - Gaps created: {len(saved_gaps)}")
 
-            return GapAnalysisResult(
-                gaps=[{
-                    "id": g.id,
-                    "title": g.title,
-                    "category": g.category.value,
-                    "priority": g.priority,
-                    "questions_count": len(g.questions)
-                } for g in saved_gaps],
-                total_documents_analyzed=len(documents),
-                categories_found=category_counts
-            )
+            return analysis
 
         except Exception as e:
             self.db.rollback()
@@ -1145,7 +1395,7 @@ Respond in JSON format:
         Args:
             tenant_id: Tenant ID
             project_id: Optional project to analyze
-            force_reanalyze: Re-analyze even if gaps exist
+            force_reanalyze: Re-analyze even if the documents are unchanged since the last run
             include_pending: Include pending documents
             max_documents: Maximum documents to analyze
 
@@ -1172,9 +1422,20 @@ Respond in JSON format:
             DocumentStatus.CONFIRMED
         ]
 
-        query = self.db.query(Document).filter(
+        # Only the columns the orchestrator reads, as plain rows rather than ORM instances
+        query = self.db.query(
+            Document.id, Document.title, Document.content, Document.summary,
+            Document.source_type, Document.classification,
+            Document.created_at, Document.updated_at
+        ).filter(
             Document.tenant_id == tenant_id,
-            Document.status.in_(allowed_statuses)
+            Document.status.in_(allowed_statuses),
+            Document.is_deleted == False,
+            # Skip documents the orchestrator would discard for lack of content
+            or_(
+                func.length(Document.content) > 50,
+                func.length(Document.summary) > 50
+            )
         )
 
         if project_id:
@@ -1192,6 +1453,12 @@ Respond in JSON format:
 
         logger.info(f"[v3.0] Found {len(documents)} documents to analyze")
 
+        corpus_fingerprint = self._corpus_fingerprint(documents)
+        if not force_reanalyze:
+            cached = self._get_cached_gap_analysis(tenant_id, project_id, "v3", corpus_fingerprint)
+            if cached:
+                return cached
+
         # Prepare documents for v3.0 orchestrator
         doc_list = []
         for doc in documents:
@@ -1230,8 +1497,16 @@ Respond in JSON format:
                 top_n_questions=30
             )
 
+            if not result.prioritized_questions:
+                logger.info("[v3.0] Analysis produced no questions")
+                analysis = GapAnalysisResult(
+                    gaps=[],
+                    total_documents_analyzed=len(documents),
+                    categories_found={}
+                )
+                return analysis
+
             # Convert to knowledge gaps and save
-            category_counts = {}
             saved_gaps = []
 
             for pq in result.prioritized_questions[:50]:
@@ -1241,40 +1516,32 @@ Respond in JSON format:
 
                 # Map v3 categories to database categories
                 category_str = (question_data.get("category") or "context").lower()
-                category_map = {
-                    "process": GapCategory.PROCESS,
-                    "technical": GapCategory.TECHNICAL,
-                    "decision": GapCategory.DECISION,
-                    "context": GapCategory.CONTEXT,
-                    "relationship": GapCategory.RELATIONSHIP,
-                    "timeline": GapCategory.TIMELINE,
-                    "outcome": GapCategory.OUTCOME,
-                    "rationale": GapCategory.RATIONALE
-                }
-                category = category_map.get(category_str, GapCategory.CONTEXT)
-                category_counts[category.value] = category_counts.get(category.value, 0) + 1
+                category = GAP_CATEGORY_MAP.get(category_str, GapCategory.CONTEXT)
 
                 # Build questions list from generated question
                 primary_question = question_data.get("primary_question", "Unknown question")
                 questions = [primary_question]
-                sub_questions = question_data.get("sub_questions", [])
+                sub_questions = question_data.get("sub_questions")
                 if sub_questions:
                     questions.extend(sub_questions[:3])
 
                 # Calculate priority (1-5) from score (0-1)
-                score = pq.get("final_score", pq.get("priority_score", 0.5))
+                score = pq.get("final_score")
+                if score is None:
+                    score = pq.get("priority_score", 0.5)
                 priority = max(1, min(5, int(score * 5) + 1))
 
-                gap = KnowledgeGap(
-                    tenant_id=tenant_id,
-                    project_id=project_id,
-                    title=primary_question[:200],
-                    description=question_data.get("priority_reasoning") or question_data.get("business_impact") or "",
-                    category=category,
-                    priority=priority,
-                    status=GapStatus.OPEN,
-                    questions=questions,
-                    context={
+                saved_gaps.append({
+                    "id": generate_uuid(),
+                    "tenant_id": tenant_id,
+                    "project_id": project_id,
+                    "title": primary_question[:200],
+                    "description": question_data.get("priority_reasoning") or question_data.get("business_impact") or "",
+                    "category": category,
+                    "priority": priority,
+                    "status": GapStatus.OPEN,
+                    "questions": questions,
+                    "context": {
                         "analysis_type": "v3.0",
                         "gap_type": gap_data.get("gap_type", "unknown"),
                         "severity": gap_data.get("severity", "medium"),
@@ -1284,10 +1551,11 @@ Respond in JSON format:
                         "estimated_effort": question_data.get("estimated_effort"),
                         "answer_format": question_data.get("answer_format_suggestion")
                     }
-                )
-                self.db.add(gap)
-                saved_gaps.append(gap)
+                })
 
+            self._insert_gaps(saved_gaps)
+            analysis = self._gap_analysis_result(saved_gaps, len(documents))
+            self._remember_gap_analysis(tenant_id, project_id, "v3", corpus_fingerprint, analysis)
             self.db.commit()
 
             # Log stats (result is an AnalysisResult object)
@@ -1298,17 +1566,7 @@ Respond in JSON format:
             logger.info(f"  - Questions generated: {result.total_questions}")
             logger.info(f"  - Gaps saved: {len(saved_gaps)}")
 
-            return GapAnalysisResult(
-                gaps=[{
-                    "id": g.id,
-                    "title": g.title,
-                    "category": g.category.value,
-                    "priority": g.priority,
-                    "questions_count": len(g.questions)
-                } for g in saved_gaps],
-                total_documents_analyzed=len(documents),
-                categories_found=category_counts
-            )
+            return analysis
 
         except Exception as e:
             self.db.rollback()
@@ -1342,13 +1600,21 @@ Respond in JSON format:
         if category:
             query = query.filter(KnowledgeGap.category == category)
 
-        total = query.count()
-        gaps = query.order_by(
+        # Total match count rides along on each row via a window function
+        rows = query.add_columns(
+            func.count().over().label("total")
+        ).order_by(
             KnowledgeGap.priority.desc(),
             KnowledgeGap.created_at.desc()
         ).offset(offset).limit(limit).all()
 
-        return gaps, total
+        if rows:
+            total = rows[0].total
+        else:
+            # Empty page: only past the end do we need a separate count
+            total = query.count() if offset else 0
+
+        return [row[0] for row in rows], total
 
     # ========================================================================
     # ANSWER MANAGEMENT
@@ -1382,24 +1648,30 @@ Respond in JSON format:
             (GapAnswer, error_message)
         """
         try:
-            # Get the gap
-            gap = self.db.query(KnowledgeGap).filter(
+            # Get the gap's questions (column only, no ORM instance)
+            gap_filter = (
                 KnowledgeGap.id == gap_id,
                 KnowledgeGap.tenant_id == tenant_id
-            ).first()
+            )
+            row = self.db.query(KnowledgeGap.questions).filter(*gap_filter).first()
 
-            if not gap:
+            if not row:
                 return None, "Knowledge gap not found"
 
             # Get question text
-            questions = gap.questions or []
+            questions = list(row.questions or [])
             if question_index >= len(questions):
                 return None, f"Question index {question_index} out of range"
 
-            question_text = questions[question_index].get("text", "")
+            question = questions[question_index]
+            # v3 gaps store plain question strings, the other modes dicts
+            if not isinstance(question, dict):
+                question = {"text": str(question)}
+            question_text = question.get("text", "")
 
             # Create answer
             answer = GapAnswer(
+                id=generate_uuid(),
                 knowledge_gap_id=gap_id,
                 tenant_id=tenant_id,  # Security: direct tenant isolation
                 user_id=user_id,
@@ -1413,17 +1685,26 @@ Respond in JSON format:
             )
             self.db.add(answer)
 
-            # Update question as answered
-            questions[question_index]["answered"] = True
-            questions[question_index]["answer_id"] = answer.id
-            gap.questions = questions
+            # Flag the question as answered; the flags are the record of
+            # which questions have answers, and the frontend reads them.
+            # A v3 string question becomes a dict so it can carry its flag.
+            question = dict(question)
+            question["answered"] = True
+            question["answer_id"] = answer.id
+            questions[question_index] = question
+
+            values = {
+                KnowledgeGap.questions: questions,
+                KnowledgeGap.updated_at: utc_now()
+            }
 
             # Check if all questions answered
-            all_answered = all(q.get("answered", False) for q in questions)
-            if all_answered:
-                gap.status = GapStatus.ANSWERED
+            if all(isinstance(q, dict) and q.get("answered", False) for q in questions):
+                values[KnowledgeGap.status] = GapStatus.ANSWERED
 
-            gap.updated_at = utc_now()
+            self.db.query(KnowledgeGap).filter(*gap_filter).update(
+                values, synchronize_session=False
+            )
 
             self.db.commit()
 
@@ -1513,42 +1794,30 @@ Respond in JSON format:
             TranscriptionResult with text and metadata
         """
         try:
-            # Save to temp file (OpenAI API needs file-like object)
-            with tempfile.NamedTemporaryFile(suffix=Path(filename).suffix, delete=False) as tmp:
-                tmp.write(audio_data)
-                tmp_path = tmp.name
-
-            try:
-                # Open file for API
-                with open(tmp_path, "rb") as audio_file:
-                    # Call Whisper API
-                    response = self.client.audio.transcriptions.create(
-                        model=AZURE_WHISPER_DEPLOYMENT,
-                        file=audio_file,
-                        language=language,
-                        response_format="verbose_json",
-                        timestamp_granularities=["segment"]
-                    )
-
-                # Parse response
-                return TranscriptionResult(
-                    text=response.text,
-                    confidence=1.0,  # Whisper doesn't provide confidence
-                    language=response.language or language or "en",
-                    duration_seconds=response.duration or 0,
-                    segments=[
-                        {
-                            "start": s.start,
-                            "end": s.end,
-                            "text": s.text
-                        }
-                        for s in (response.segments or [])
-                    ]
-                )
+            # Pass the bytes straight through; the filename tells the API the format
+            response = self.client.client.audio.transcriptions.create(
+                model=AZURE_WHISPER_DEPLOYMENT,
+                file=(filename, audio_data),
+                language=language,
+                response_format="verbose_json",
+                timestamp_granularities=["segment"]
+            )
 
-            finally:
-                # Clean up temp file
-                os.unlink(tmp_path)
+            # Parse response
+            return TranscriptionResult(
+                text=response.text,
+                confidence=1.0,  # Whisper doesn't provide confidence
+                language=response.language or language or "en",
+                duration_seconds=response.duration or 0,
+                segments=[
+                    {
+                        "start": s.start,
+                        "end": s.end,
+                        "text": s.text
+                    }
+                    for s in (response.segments or [])
+                ]
+            )
 
         except Exception as e:
             return TranscriptionResult(
@@ -1584,23 +1853,30 @@ Respond in JSON format:
         Returns:
             (GapAnswer, error)
         """
-        # Transcribe
-        result = self.transcribe_audio(audio_data, filename)
+        # Transcription is a network call that doesn't touch the session,
+        # so it runs on a worker while the audio is saved here
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            transcription = executor.submit(self.transcribe_audio, audio_data, filename)
 
-        if not result.text:
-            return None, "Transcription failed or returned empty text"
+            # Save audio file if requested
+            audio_path = None
+            if save_audio:
+                _, data_directory = self._tenant_data_directory(tenant_id)
+                if data_directory:
+                    audio_dir = Path(data_directory) / "audio"
+                    audio_dir.mkdir(parents=True, exist_ok=True)
 
-        # Save audio file if requested
-        audio_path = None
-        if save_audio:
-            tenant = self.db.query(Tenant).filter(Tenant.id == tenant_id).first()
-            if tenant and tenant.data_directory:
-                audio_dir = Path(tenant.data_directory) / "audio"
-                audio_dir.mkdir(parents=True, exist_ok=True)
+                    audio_path = str(audio_dir / f"{generate_uuid()}{Path(filename).suffix}")
+                    with open(audio_path, "wb") as f:
+                        f.write(audio_data)
 
-                audio_path = str(audio_dir / f"{generate_uuid()}{Path(filename).suffix}")
-                with open(audio_path, "wb") as f:
-                    f.write(audio_data)
+            result = transcription.result()
+
+        if not result.text:
+            # No answer to attach the recording to
+            if audio_path:
+                os.remove(audio_path)
+            return None, "Transcription failed or returned empty text"
 
         # Submit answer
         return self.submit_answer(
@@ -1618,6 +1894,24 @@ Respond in JSON format:
     # EMBEDDING INDEX MANAGEMENT
     # ========================================================================
 
+    def _tenant_data_directory(self, tenant_id: str) -> Tuple[bool, Optional[str]]:
+        """
+        Look up a tenant's data directory, cached for a short TTL.
+
+        Returns:
+            (tenant exists, data_directory)
+        """
+        entry = _TENANT_DATA_DIR_CACHE.get(tenant_id)
+        if entry and time.monotonic() - entry[0] < _TENANT_DATA_DIR_TTL:
+            return True, entry[1]
+
+        row = self.db.query(Tenant.data_directory).filter(Tenant.id == tenant_id).first()
+        if row is None:
+            return False, None
+
+        _TENANT_DATA_DIR_CACHE.set(tenant_id, (time.monotonic(), row.data_directory))
+        return True, row.data_directory
+
     def rebuild_embedding_index(
         self,
         tenant_id: str,
@@ -1635,25 +1929,42 @@ Respond in JSON format:
         """
         try:
             # Get tenant
-            tenant = self.db.query(Tenant).filter(Tenant.id == tenant_id).first()
-            if not tenant:
+            tenant_exists, data_directory = self._tenant_data_directory(tenant_id)
+            if not tenant_exists:
                 return {"error": "Tenant not found"}
 
-            # Get confirmed work documents
-            documents = self.db.query(Document).filter(
+            # Get confirmed work documents (only the columns chunking and
+            # the index metadata use, as plain rows rather than ORM instances).
+            # Documents without content produce no chunks, so they're skipped
+            # in SQL rather than fetched.
+            documents = self.db.query(
+                Document.id, Document.title, Document.content, Document.sender,
+                Document.source_type, Document.source_created_at
+            ).filter(
                 Document.tenant_id == tenant_id,
                 Document.status == DocumentStatus.CONFIRMED,
                 Document.classification == DocumentClassification.WORK,
-                Document.is_deleted == False
+                Document.is_deleted == False,
+                func.length(Document.content) > 0
             ).all()
 
-            # Also include gap answers as documents
-            answers = self.db.query(GapAnswer).join(
-                KnowledgeGap,
-                GapAnswer.knowledge_gap_id == KnowledgeGap.id
-            ).filter(
-                KnowledgeGap.tenant_id == tenant_id
-            ).all()
+            # Chunking is CPU work that doesn't touch the session, so it runs
+            # on a worker while the gap answers are fetched
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                chunking = executor.submit(self._chunk_documents, documents)
+
+                # Also include gap answers as documents
+                answers = self.db.query(
+                    GapAnswer.id, GapAnswer.knowledge_gap_id, GapAnswer.question_text,
+                    GapAnswer.answer_text, GapAnswer.created_at
+                ).join(
+                    KnowledgeGap,
+                    GapAnswer.knowledge_gap_id == KnowledgeGap.id
+                ).filter(
+                    KnowledgeGap.tenant_id == tenant_id
+                ).all()
+
+                chunked = chunking.result()
 
             # Return early if nothing to index
             if not documents and not answers:
@@ -1664,47 +1975,27 @@ Respond in JSON format:
                     "message": "No documents or answers to index"
                 }
 
-            # Build chunks
-            chunks = []
+            # Build the index entries in one pass over a chunk generator, in
+            # the format expected by EnhancedRAGv2 ({"content", "metadata"}).
+            # Chunk text is held once, by formatted_chunks; the embedding
+            # batches read it from there.
+            formatted_chunks = []
             doc_index = {}
-
-            for doc in documents:
-                # Split document into chunks
-                doc_chunks = self._chunk_document(doc)
-                for i, chunk_text in enumerate(doc_chunks):
-                    chunk_id = f"{doc.id}_{i}"
-                    chunks.append({
-                        "id": chunk_id,
-                        "text": chunk_text,
-                        "doc_id": doc.id,
-                        "chunk_index": i
-                    })
-                    doc_index[chunk_id] = {
-                        "doc_id": doc.id,
-                        "title": doc.title,
-                        "source_type": doc.source_type,
-                        "sender": doc.sender,
-                        "date": doc.source_created_at.isoformat() if doc.source_created_at else None
-                    }
-
-            # Add answers as chunks
-            for answer in answers:
-                chunk_id = f"answer_{answer.id}"
-                chunks.append({
-                    "id": chunk_id,
-                    "text": f"Q: {answer.question_text}\nA: {answer.answer_text}",
-                    "doc_id": f"gap_{answer.knowledge_gap_id}",
-                    "chunk_index": 0
+            for chunk_id, chunk_text, metadata in self._iter_index_chunks(
+                documents, chunked, answers
+            ):
+                formatted_chunks.append({
+                    "content": chunk_text,
+                    "metadata": metadata,
+                    "chunk_id": chunk_id,
+                    "content_hash": hashlib.blake2b(
+                        chunk_text.encode(), digest_size=16
+                    ).hexdigest()
                 })
-                doc_index[chunk_id] = {
-                    "doc_id": f"gap_{answer.knowledge_gap_id}",
-                    "title": f"Answer: {answer.question_text[:50]}...",
-                    "source_type": "gap_answer",
-                    "sender": "Knowledge Gap Response",
-                    "date": answer.created_at.isoformat() if answer.created_at else None
-                }
+                doc_index[chunk_id] = metadata
+            del chunked
 
-            if not chunks:
+            if not formatted_chunks:
                 return {
                     "success": True,
                     "documents_processed": len(documents),
@@ -1712,65 +2003,110 @@ Respond in JSON format:
                     "message": "No content to index"
                 }
 
-            # Generate embeddings in batches
-            embeddings = []
-            batch_size = 100
-
-            for i in range(0, len(chunks), batch_size):
-                batch = chunks[i:i + batch_size]
-                batch_texts = [c["text"] for c in batch]
-
-                response = self.client.create_embedding(
-                    text=batch_texts,
-                    dimensions=1536  # Match existing index
+            index_path = None
+            if data_directory:
+                index_path = Path(data_directory) / "embedding_index.pkl"
+
+            # Chunks whose text is unchanged since the last build keep their
+            # stored vectors; only new or edited text goes to the API, and
+            # text repeated across chunks (signatures, disclaimers) only once
+            previous = self._previous_embeddings(index_path) if index_path else {}
+
+            # The matrix holds unit-length rows at half precision: cosine
+            # ranking is unaffected while the index takes half the disk and
+            # memory. With a tenant directory it is an .npy memory map that
+            # batches are written into as they arrive, so the OS can page it
+            # out instead of the whole matrix sitting in RAM until saved.
+            # Each build writes a new file, which only becomes live when the
+            # pickle naming it replaces the old one; readers of the previous
+            # index keep a complete matrix throughout.
+            matrix_shape = (len(formatted_chunks), 1536)
+            if index_path:
+                index_path.parent.mkdir(parents=True, exist_ok=True)
+                embeddings_path = new_embeddings_path(index_path)
+                embedding_matrix = np.lib.format.open_memmap(
+                    embeddings_path, mode="w+", dtype=EMBEDDING_DTYPE, shape=matrix_shape
                 )
+            else:
+                embeddings_path = None
+                embedding_matrix = np.empty(matrix_shape, dtype=EMBEDDING_DTYPE)
+
+            pending_rows: Dict[str, List[int]] = {}
+            for row, chunk in enumerate(formatted_chunks):
+                vector = previous.get(chunk["content_hash"])
+                if vector is None:
+                    pending_rows.setdefault(chunk["content_hash"], []).append(row)
+                else:
+                    embedding_matrix[row] = vector
+            rows_to_embed = [rows[0] for rows in pending_rows.values()]
 
-                for j, emb in enumerate(response.data):
-                    embeddings.append(emb.embedding)
+            logger.info(
+                f"Embedding index for tenant {tenant_id}: {len(rows_to_embed)} of "
+                f"{len(formatted_chunks)} chunks need new embeddings"
+            )
 
-            # Build index structure
-            import numpy as np
+            # Generate embeddings in batches. The requests are network-bound,
+            # so several run concurrently; map() yields responses in batch order.
+            batch_rows = [
+                rows_to_embed[i:i + EMBEDDING_BATCH_SIZE]
+                for i in range(0, len(rows_to_embed), EMBEDDING_BATCH_SIZE)
+            ]
 
-            embedding_matrix = np.array(embeddings, dtype=np.float32)
+            def embed_batch(rows: List[int]):
+                return self.client.create_embedding(
+                    text=[formatted_chunks[row]["content"] for row in rows],
+                    dimensions=1536  # Match existing index
+                )
 
-            # Build chunks in the format expected by EnhancedRAGv2
-            # RAG expects: {"content": str, "metadata": dict}
-            formatted_chunks = []
-            for c in chunks:
-                formatted_chunks.append({
-                    "content": c["text"],
-                    "metadata": doc_index.get(c["id"], {}),
-                    "chunk_id": c["id"]
-                })
+            # Write each batch straight into its rows of the index matrix
+            # rather than accumulating per-chunk float lists
+            if batch_rows:
+                with ThreadPoolExecutor(
+                    max_workers=min(EMBEDDING_PARALLEL_BATCHES, len(batch_rows))
+                ) as executor:
+                    for rows, response in zip(batch_rows, executor.map(embed_batch, batch_rows)):
+                        vectors = np.asarray(
+                            [emb.embedding for emb in response.data], dtype=np.float32
+                        )
+                        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-8
+                        embedding_matrix[rows] = vectors
+
+            # Copy each embedded vector to the other chunks with the same text
+            for rows in pending_rows.values():
+                if len(rows) > 1:
+                    embedding_matrix[rows[1:]] = embedding_matrix[rows[0]]
 
             index_data = {
                 "chunks": formatted_chunks,
-                "embeddings": embedding_matrix,
+                # The matrix is stored beside the pickle as a .npy file that
+                # loaders can memory-map instead of unpickling
+                "embeddings_file": embeddings_path.name if embeddings_path else None,
                 "doc_index": doc_index,
-                "chunk_ids": [c["id"] for c in chunks],
+                "chunk_ids": [c["chunk_id"] for c in formatted_chunks],
                 "metadata": {
                     "created_at": utc_now().isoformat(),
                     "document_count": len(documents),
-                    "chunk_count": len(chunks),
+                    "chunk_count": len(formatted_chunks),
                     "embedding_model": self.client.get_embedding_model(),
-                    "embedding_dimensions": 1536
+                    "embedding_dimensions": 1536,
+                    "embedding_dtype": EMBEDDING_DTYPE,
+                    "normalized": True
                 }
             }
 
             # Save to tenant directory
-            if tenant.data_directory:
-                index_path = Path(tenant.data_directory) / "embedding_index.pkl"
-                index_path.parent.mkdir(parents=True, exist_ok=True)
-
-                with open(index_path, "wb") as f:
-                    pickle.dump(index_data, f)
+            if index_path:
+                embedding_matrix.flush()
+                del embedding_matrix
+                write_index_pickle(index_data, index_path)
 
             return {
                 "success": True,
                 "documents_processed": len(documents),
                 "answers_included": len(answers),
-                "chunks_created": len(chunks),
-                "index_path": str(index_path) if tenant.data_directory else None
+                "chunks_created": len(formatted_chunks),
+                "chunks_embedded": len(rows_to_embed),
+                "index_path": str(index_path) if index_path else None
             }
 
         except Exception as e:
@@ -1779,51 +2115,71 @@ Respond in JSON format:
                 "error": str(e)
             }
 
-    def _chunk_document(
-        self,
-        document: Document,
-        chunk_size: int = 1000,
-        overlap: int = 200
-    ) -> List[str]:
-        """
-        Split document into overlapping chunks.
-        """
-        content = document.content or ""
-        if not content:
-            return []
+    @staticmethod
+    def _chunk_documents(documents) -> List[List[str]]:
+        """Chunk each document row, returning one list of chunks per document."""
+        return [_chunk_document(doc.title, doc.sender, doc.content) for doc in documents]
 
-        # Add title/metadata to first chunk
-        header = f"Title: {document.title or 'Untitled'}\n"
-        if document.sender:
-            header += f"From: {document.sender}\n"
-        header += "\n"
-
-        chunks = []
-        start = 0
-
-        while start < len(content):
-            end = start + chunk_size
-
-            # Try to break at sentence boundary
-            if end < len(content):
-                # Look for sentence end
-                for sep in [". ", ".\n", "! ", "!\n", "? ", "?\n"]:
-                    last_sep = content[start:end].rfind(sep)
-                    if last_sep > chunk_size // 2:
-                        end = start + last_sep + len(sep)
-                        break
-
-            chunk_text = content[start:end].strip()
+    @staticmethod
+    def _iter_index_chunks(documents, chunked, answers):
+        """
+        Yield (chunk_id, text, metadata) for every index chunk: each
+        document's chunks (chunked[i] belongs to documents[i]), then one
+        Q/A chunk per gap answer.
 
-            if chunk_text:
-                # Add header to first chunk
-                if start == 0:
-                    chunk_text = header + chunk_text
-                chunks.append(chunk_text)
+        A document's chunks share one metadata dict, which pickle then
+        stores once, so metadata costs one dict per document rather than
+        one per chunk. Index readers treat metadata as read-only.
+        """
+        for doc, doc_chunks in zip(documents, chunked):
+            metadata = {
+                "doc_id": doc.id,
+                "title": doc.title,
+                "source_type": doc.source_type,
+                "sender": doc.sender,
+                "date": doc.source_created_at.isoformat() if doc.source_created_at else None
+            }
+            for i, chunk_text in enumerate(doc_chunks):
+                yield f"{doc.id}_{i}", chunk_text, metadata
+
+        for answer_id, gap_id, question, answer_text, created_at in answers:
+            question = question or ""
+            yield f"answer_{answer_id}", "".join(("Q: ", question, "\nA: ", answer_text)), {
+                "doc_id": f"gap_{gap_id}",
+                "title": "".join(("Answer: ", question[:50] if len(question) > 50 else question, "...")),
+                "source_type": "gap_answer",
+                "sender": "Knowledge Gap Response",
+                "date": created_at.isoformat() if created_at else None
+            }
 
-            start = end - overlap
+    def _previous_embeddings(self, index_path: Path) -> Dict[str, np.ndarray]:
+        """
+        Map content hashes to vectors from the tenant's existing index.
 
-        return chunks
+        Only indexes built with the current embedding model, in the split
+        .npy layout with per-chunk content hashes, can be reused; anything
+        else (or an unreadable index) yields an empty map and a full rebuild.
+        """
+        try:
+            index = load_embedding_index(index_path)
+            metadata = index.get("metadata", {})
+            if (
+                not index.get("embeddings_file")
+                or metadata.get("embedding_model") != self.client.get_embedding_model()
+                or metadata.get("embedding_dimensions") != 1536
+            ):
+                return {}
+            matrix = index["embeddings"]
+            return {
+                chunk["content_hash"]: matrix[row]
+                for row, chunk in enumerate(index["chunks"])
+                if chunk.get("content_hash")
+            }
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Could not reuse embeddings from {index_path}: {e}")
+            return {}
 
     # ========================================================================
     # STATISTICS
@@ -1857,12 +2213,6 @@ Respond in JSON format:
         try:
             logger.info(f"Starting knowledge process completion for tenant {tenant_id}")
 
-            # Get all answered knowledge gaps
-            answered_gaps = self.db.query(KnowledgeGap).filter(
-                KnowledgeGap.tenant_id == tenant_id,
-                KnowledgeGap.status.in_([GapStatus.ANSWERED, GapStatus.IN_PROGRESS, GapStatus.OPEN])
-            ).all()
-
             # Count answers that will be integrated
             all_answers = self.db.query(GapAnswer).join(
                 KnowledgeGap,
@@ -1891,19 +2241,17 @@ Respond in JSON format:
 
             gaps_completed = 0
 
-            # Mark gaps with any answers as verified/completed
+            # Mark gaps with any answers as verified/completed, in a single
+            # UPDATE with a correlated EXISTS instead of a count per gap
             if mark_completed:
-                for gap in answered_gaps:
-                    # Check if this gap has any answers
-                    gap_answers = self.db.query(GapAnswer).filter(
-                        GapAnswer.knowledge_gap_id == gap.id
-                    ).count()
-
-                    if gap_answers > 0:
-                        # Mark as verified if has answers
-                        gap.status = GapStatus.VERIFIED
-                        gap.updated_at = utc_now()
-                        gaps_completed += 1
+                gaps_completed = self.db.query(KnowledgeGap).filter(
+                    KnowledgeGap.tenant_id == tenant_id,
+                    KnowledgeGap.status.in_([GapStatus.ANSWERED, GapStatus.IN_PROGRESS, GapStatus.OPEN]),
+                    KnowledgeGap.answers.any()
+                ).update({
+                    KnowledgeGap.status: GapStatus.VERIFIED,
+                    KnowledgeGap.updated_at: utc_now()
+                }, synchronize_session=False)
 
                 self.db.commit()
                 logger.info(f"Marked {gaps_completed} gaps as verified")
@@ -1933,42 +2281,29 @@ Respond in JSON format:
         """
         Get knowledge gap statistics.
         """
-        # Gaps by status
-        status_counts = dict(
-            self.db.query(
-                KnowledgeGap.status,
-                func.count(KnowledgeGap.id)
-            ).filter(
-                KnowledgeGap.tenant_id == tenant_id
-            ).group_by(KnowledgeGap.status).all()
-        )
-
-        # Gaps by category
-        category_counts = dict(
-            self.db.query(
-                KnowledgeGap.category,
-                func.count(KnowledgeGap.id)
-            ).filter(
-                KnowledgeGap.tenant_id == tenant_id
-            ).group_by(KnowledgeGap.category).all()
-        )
-
-        # Total answers
-        total_answers = self.db.query(func.count(GapAnswer.id)).join(
-            KnowledgeGap,
-            GapAnswer.knowledge_gap_id == KnowledgeGap.id
+        # Gaps by status and by category, from one GROUP BY over both
+        status_counts = Counter()
+        category_counts = Counter()
+        for status, category, count in self.db.query(
+            KnowledgeGap.status,
+            KnowledgeGap.category,
+            func.count(KnowledgeGap.id)
         ).filter(
             KnowledgeGap.tenant_id == tenant_id
-        ).scalar()
-
-        # Voice answers
-        voice_answers = self.db.query(func.count(GapAnswer.id)).join(
+        ).group_by(KnowledgeGap.status, KnowledgeGap.category):
+            status_counts[status] += count
+            category_counts[category] += count
+
+        # Total and voice answers in one pass
+        total_answers, voice_answers = self.db.query(
+            func.count(GapAnswer.id),
+            func.sum(case((GapAnswer.is_voice_transcription == True, 1), else_=0))
+        ).join(
             KnowledgeGap,
             GapAnswer.knowledge_gap_id == KnowledgeGap.id
         ).filter(
-            KnowledgeGap.tenant_id == tenant_id,
-            GapAnswer.is_voice_transcription == True
-        ).scalar()
+            KnowledgeGap.tenant_id == tenant_id
+        ).one()
 
         return {
             "by_status": {
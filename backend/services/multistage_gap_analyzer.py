@@ -16,19 +16,159 @@ Designed for B2B SaaS: tenant-agnostic, scalable, universal.
 """
 
 import os
+import re
+import math
 import json
+import time
+import random
+import heapq
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass, field
-from datetime import datetime
+import threading
+from typing import List, Dict, Any, Optional, Iterator
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from openai import RateLimitError, APITimeoutError, APIConnectionError, InternalServerError
 
 from services.openai_client import get_openai_client
+from utils.tokens import count_tokens
+from utils.bounded_cache import BoundedCache
 
 
 logger = logging.getLogger(__name__)
 
+# Parsed LLM responses keyed by a digest of (system message, prompt,
+# temperature) -> (cached at, response). A prompt embeds the corpus text it
+# is about, so a hit means the same documents were analyzed again.
+_LLM_RESPONSE_CACHE_SIZE = 256
+_LLM_RESPONSE_CACHE = BoundedCache(_LLM_RESPONSE_CACHE_SIZE)
+LLM_RESPONSE_CACHE_TTL = int(os.getenv("GAP_ANALYSIS_LLM_CACHE_TTL", "86400"))  # seconds
+
+# Attempts per LLM call and the first backoff delay (doubling, with jitter)
+LLM_CALL_ATTEMPTS = 4
+LLM_RETRY_BASE_DELAY = 1.0  # seconds
+
+# Failures worth retrying: the response may succeed on a later attempt
+_RETRYABLE_LLM_ERRORS = (
+    RateLimitError, APITimeoutError, APIConnectionError, InternalServerError,
+    json.JSONDecodeError
+)
+
+
+class LLMCallError(RuntimeError):
+    """An LLM call still failed after all retry attempts"""
+
+
+class _RateLimiter:
+    """
+    Thread-safe token bucket holding up to capacity units that refill
+    evenly over period seconds; acquire() blocks until enough are free.
+    """
+
+    def __init__(self, capacity: int, period: float = 60.0):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.level = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount: int = 1):
+        # A request larger than the whole bucket waits for a full bucket
+        amount = min(amount, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.level >= amount:
+                    self.level -= amount
+                    return
+                wait = (amount - self.level) / self.rate
+            time.sleep(wait)
+
+
+# Requests and tokens per minute shared by every analysis in the process
+# (all tenants draw on one OpenAI account), so concurrent stages queue here
+# rather than hitting 429s and the retry backoff. Set to the account's tier.
+_RPM_LIMITER = _RateLimiter(int(os.getenv("OPENAI_RPM", "3000")))
+_TPM_LIMITER = _RateLimiter(int(os.getenv("OPENAI_TPM", "500000")))
+
 
-@dataclass
+def _wait_for_rate_limit(prompt: str, max_tokens: int):
+    """Reserve one request and its estimated prompt + response tokens"""
+    _RPM_LIMITER.acquire()
+    _TPM_LIMITER.acquire(count_tokens(prompt) + max_tokens)
+
+
+# Stage 1 sends the whole corpus in one prompt up to this many tokens;
+# beyond it the corpus is split into shards analyzed concurrently and merged
+STAGE_1_TOKEN_BUDGET = 60000
+STAGE_1_SHARD_TOKENS = 30000
+STAGE_1_PARALLEL_SHARDS = 5
+
+DOCUMENT_SEPARATOR = "\n\n---\n\n"
+
+
+def _allocate_token_budget(token_counts: List[int], budget: int) -> List[int]:
+    """
+    Split a token budget across documents in proportion to log(1 + length),
+    so many documents get a fair share rather than one huge one taking most
+    of it. Documents shorter than their share keep their full length and
+    the unused remainder is shared out among the rest.
+    """
+    allocation = list(token_counts)
+    if sum(token_counts) <= budget:
+        return allocation
+
+    remaining = set(range(len(token_counts)))
+    while remaining:
+        weights = {i: math.log1p(token_counts[i]) for i in remaining}
+        total_weight = sum(weights.values()) or 1.0
+        shares = {i: budget * weights[i] / total_weight for i in remaining}
+        fitting = [i for i in remaining if token_counts[i] <= shares[i]]
+        if not fitting:
+            for i in remaining:
+                allocation[i] = int(shares[i])
+            break
+        for i in fitting:
+            budget -= token_counts[i]
+            remaining.discard(i)
+    return allocation
+
+
+# Synthesized questions at least this similar (cosine) to a higher-priority
+# one are dropped as paraphrases
+QUESTION_SIMILARITY_THRESHOLD = 0.9
+# Questions whose character-trigram sets overlap at least this much
+# (Jaccard) are near-verbatim repeats, dropped before any embedding
+QUESTION_SHINGLE_THRESHOLD = 0.85
+QUESTION_EMBEDDING_DIMENSIONS = 512
+
+# Question embeddings keyed by question_hash() of the question text
+_QUESTION_EMBEDDING_CACHE_SIZE = 1024
+_QUESTION_EMBEDDING_CACHE = BoundedCache(_QUESTION_EMBEDDING_CACHE_SIZE)
+
+# Smaller chat model/deployment for the extraction stages (2-4); unset keeps
+# every stage on the client's default chat model
+GAP_ANALYSIS_LIGHT_MODEL = os.getenv("GAP_ANALYSIS_LIGHT_MODEL") or None
+
+
+def _llm_cache_key(
+    system_message: str,
+    prompt: str,
+    temperature: float,
+    model: Optional[str] = None
+) -> str:
+    """Digest identifying one LLM call by everything that shapes its output"""
+    return hashlib.sha256(
+        f"{system_message}\0{prompt}\0{temperature}\0{model or ''}".encode()
+    ).hexdigest()
+
+
+@dataclass(slots=True)
 class DocumentContext:
     """Represents a document with relevant metadata for analysis."""
     id: str
@@ -44,7 +184,8 @@ class DocumentContext:
 
         Args:
             max_content_length: Maximum content length. None = no limit (default).
-                               GPT-4o has 128K token context, so we can handle large docs.
+                               Longer content keeps its head and tail, where
+                               the substance usually is, and drops the middle.
         """
         parts = [f"[Document: {self.title}]"]
         if self.source_type:
@@ -59,13 +200,14 @@ class DocumentContext:
         # Use full content by default - no artificial truncation
         content = self.content
         if max_content_length and len(content) > max_content_length:
-            content = content[:max_content_length]
+            half = max_content_length // 2
+            content = content[:half] + "\n...[truncated]...\n" + content[len(content) - half:]
 
         parts.append(f"Content:\n{content}")
         return "\n".join(parts)
 
 
-@dataclass
+@dataclass(slots=True)
 class CorpusUnderstanding:
     """Result of Stage 1: Corpus Understanding."""
     key_entities: List[Dict[str, Any]] = field(default_factory=list)
@@ -80,7 +222,7 @@ class CorpusUnderstanding:
     raw_summary: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class ExpertInsight:
     """Result of Stage 2: Expert Mind Simulation."""
     tacit_knowledge_gaps: List[str] = field(default_factory=list)
@@ -90,7 +232,7 @@ class ExpertInsight:
     implicit_decisions: List[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class NewHireBlockers:
     """Result of Stage 3: New Hire Simulation."""
     context_gaps: List[str] = field(default_factory=list)
@@ -101,7 +243,7 @@ class NewHireBlockers:
     onboarding_blockers: List[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class FailureModeInsight:
     """Result of Stage 4: Failure Mode Analysis."""
     documented_procedures: List[str] = field(default_factory=list)
@@ -111,7 +253,7 @@ class FailureModeInsight:
     undocumented_workarounds: List[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class SynthesizedQuestion:
     """A synthesized knowledge gap question."""
     question: str
@@ -123,7 +265,7 @@ class SynthesizedQuestion:
     answerable_by: List[str] = field(default_factory=list)  # Roles who can answer
 
 
-@dataclass
+@dataclass(slots=True)
 class MultiStageAnalysisResult:
     """Complete result of multi-stage gap analysis."""
     corpus_understanding: CorpusUnderstanding
@@ -134,6 +276,197 @@ class MultiStageAnalysisResult:
     analysis_metadata: Dict[str, Any] = field(default_factory=dict)
 
 
+def _strict_object(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON schema object in the form Structured Outputs' strict mode requires"""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+
+def _string_lists_schema(cls) -> Dict[str, Any]:
+    """Schema for a stage result dataclass whose fields are all List[str]"""
+    return _strict_object({f.name: _STRING_LIST for f in fields(cls)})
+
+
+_STRING = {"type": "string"}
+_STRING_LIST = {"type": "array", "items": _STRING}
+
+# Response schemas per stage, mirroring the result dataclasses and the JSON
+# shapes the prompts describe. Sent as strict Structured Outputs so every
+# key is always present in the response.
+STAGE_SCHEMAS = {
+    "stage1": _strict_object({
+        "key_entities": {"type": "array", "items": _strict_object({
+            "name": _STRING, "type": _STRING, "importance": {"type": "integer"}, "context": _STRING
+        })},
+        "projects": {"type": "array", "items": _strict_object({
+            "name": _STRING, "status": _STRING, "key_people": _STRING_LIST, "description": _STRING
+        })},
+        "people": {"type": "array", "items": _strict_object({
+            "name": _STRING, "role": _STRING, "team": _STRING, "responsibilities": _STRING_LIST
+        })},
+        "technologies": _STRING_LIST,
+        "processes": _STRING_LIST,
+        "timeline": {"type": "array", "items": _strict_object({
+            "date": _STRING, "event": _STRING, "significance": _STRING
+        })},
+        "relationships": {"type": "array", "items": _strict_object({
+            "from": _STRING, "to": _STRING, "relationship_type": _STRING, "context": _STRING
+        })},
+        "domain_context": _STRING,
+        "organizational_structure": _STRING,
+        "raw_summary": _STRING
+    }),
+    "stage1_merge": _strict_object({
+        "domain_context": _STRING,
+        "organizational_structure": _STRING,
+        "raw_summary": _STRING
+    }),
+    "stage2": _string_lists_schema(ExpertInsight),
+    "stage3": _string_lists_schema(NewHireBlockers),
+    "stage4": _string_lists_schema(FailureModeInsight),
+    "stage5": _strict_object({
+        "questions": {"type": "array", "items": _strict_object({
+            "question": _STRING,
+            "category": _STRING,
+            "priority": {"type": "integer"},
+            "reasoning": _STRING,
+            "source_stage": _STRING,
+            "related_entities": _STRING_LIST,
+            "answerable_by": _STRING_LIST
+        })}
+    }),
+}
+STAGE_SCHEMAS["stages234"] = _strict_object({
+    "expert": STAGE_SCHEMAS["stage2"],
+    "newhire": STAGE_SCHEMAS["stage3"],
+    "failure": STAGE_SCHEMAS["stage4"]
+})
+
+
+def _response_format(schema: Optional[str]) -> Dict[str, Any]:
+    """response_format for a call: the named stage schema, else any JSON object"""
+    if not schema:
+        return {"type": "json_object"}
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": schema, "schema": STAGE_SCHEMAS[schema], "strict": True}
+    }
+
+
+def _split_stage_prompt(template: str) -> tuple:
+    """Split a Stage 2-4 prompt into (role line, instructions, JSON schema)"""
+    role, _, rest = template.partition("\n\n")
+    instructions = rest.split("{documents_sample}\n\n", 1)[1]
+    instructions, _, schema = instructions.partition("\n\nRespond in JSON:\n")
+    return role, instructions, schema
+
+
+def _fused_stage_prompt(expert: str, newhire: str, failure: str) -> str:
+    """
+    Combine the Stage 2, 3 and 4 prompts into one that shares a single copy
+    of the corpus context and asks for all three JSON results at once.
+    """
+    sections = []
+    schemas = []
+    for key, (role, instructions, schema) in (
+        ("expert", _split_stage_prompt(expert)),
+        ("newhire", _split_stage_prompt(newhire)),
+        ("failure", _split_stage_prompt(failure)),
+    ):
+        sections.append(f"=== PERSPECTIVE \"{key}\" ===\n{role}\n\n{instructions}")
+        schemas.append(f'    "{key}": {schema}')
+
+    return (
+        "Analyze this organization's work from three perspectives in turn.\n\n"
+        "Organizational context:\n{corpus_understanding}\n\n"
+        "Sample documents:\n{documents_sample}\n\n"
+        + "\n\n".join(sections)
+        + "\n\nRespond in JSON with one object per perspective:\n{{\n"
+        + ",\n".join(schemas)
+        + "\n}}"
+    )
+
+
+def _compact_json(data: Any) -> str:
+    """
+    Serialize prompt context as JSON without indentation or \\u escapes;
+    the model reads it just as well and it costs fewer tokens.
+    """
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def _bullet_sections(sections, cap: int = 10) -> str:
+    """
+    Render (heading, items) pairs as "Heading:" followed by up to cap
+    "- item" lines, skipping sections the model returned nothing for.
+    """
+    return "\n\n".join(
+        heading + ":\n" + "\n".join(f"- {item}" for item in items[:cap])
+        for heading, items in sections
+        if items
+    )
+
+
+def _dedupe_items(items) -> list:
+    """
+    Drop repeated Stage 1 list items, keeping first occurrences. Dicts are
+    matched by case-insensitive "name" when they have one, strings
+    case-insensitively, anything else by its JSON form.
+    """
+    seen = set()
+    unique = []
+    for item in items:
+        if isinstance(item, dict) and item.get("name"):
+            key = ("name", str(item["name"]).strip().lower())
+        elif isinstance(item, str):
+            key = ("str", item.strip().lower())
+        else:
+            key = ("json", json.dumps(item, sort_keys=True, default=str))
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
+    return unique
+
+
+def question_hash(text: str) -> str:
+    """
+    Stable digest of a question's case- and whitespace-normalized text,
+    usable as an embedding cache key across runs
+    """
+    return hashlib.blake2b(text.strip().lower().encode(), digest_size=16).hexdigest()
+
+
+def _question_shingles(text: str) -> frozenset:
+    """Character trigrams of a question with case, punctuation and spacing normalized"""
+    normalized = " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+    return frozenset(normalized[i:i + 3] for i in range(max(len(normalized) - 2, 1)))
+
+
+def _merge_question(kept: "SynthesizedQuestion", duplicate: "SynthesizedQuestion"):
+    """
+    Fold a dropped duplicate's entities and answerers into the kept question.
+    The lists are replaced, not extended: they may be shared with a cached
+    LLM response.
+    """
+    kept.related_entities = kept.related_entities + [
+        e for e in duplicate.related_entities if e not in kept.related_entities
+    ]
+    kept.answerable_by = kept.answerable_by + [
+        a for a in duplicate.answerable_by if a not in kept.answerable_by
+    ]
+
+
+def _from_json(cls, data: Any):
+    """Build a stage result dataclass from the LLM's JSON, ignoring unknown keys"""
+    if not isinstance(data, dict):
+        data = {}
+    return cls(**{f.name: data[f.name] for f in fields(cls) if f.name in data})
+
+
 class MultiStageGapAnalyzer:
     """
     Multi-Stage LLM Gap Analyzer for intelligent knowledge gap detection.
@@ -194,6 +527,20 @@ Respond in JSON:
     "raw_summary": "3-4 paragraph comprehensive summary of everything learned"
 }}"""
 
+    # Stage 1 reduce step for corpora analyzed in shards
+    STAGE_1_MERGE_PROMPT = """You are a knowledge analyst. An organization's documents were too many to read at once, so they were analyzed in parts. Here is what each part revealed:
+
+{shard_summaries}
+
+Combine these into one picture of the organization as a whole. Reconcile overlaps and keep every distinct project, person, system and process that matters.
+
+Respond in JSON:
+{{
+    "domain_context": "Brief description of the organization's domain and work",
+    "organizational_structure": "Description of org structure based on evidence",
+    "raw_summary": "3-4 paragraph comprehensive summary of everything learned"
+}}"""
+
     # Stage 2: Expert Mind Simulation Prompt - WORK-FOCUSED
     STAGE_2_PROMPT = """You are simulating the mind of a departing employee who has been doing this work for years.
 
@@ -341,6 +688,9 @@ Respond in JSON:
     "undocumented_workarounds": ["Known workarounds not in docs..."]
 }}"""
 
+    # Stages 2-4 in one call: the three prompts above sharing one context
+    STAGE_234_PROMPT = _fused_stage_prompt(STAGE_2_PROMPT, STAGE_3_PROMPT, STAGE_4_PROMPT)
+
     # Stage 5: Question Synthesis Prompt - FOCUSED ON TACIT KNOWLEDGE EXTRACTION
     STAGE_5_PROMPT = """You are preparing knowledge transfer questions for a departing employee. Your goal is to extract TACIT KNOWLEDGE that would be LOST if they leave without documenting it.
 
@@ -420,6 +770,34 @@ PRIORITY SCORING:
 
 Focus on what would cause the MOST PROBLEMS if the employee left tomorrow without answering."""
 
+    # Model per stage (None = the client's default chat model). Stages 2-4
+    # extract from an already-distilled corpus summary, so they can run on
+    # a smaller deployment when GAP_ANALYSIS_LIGHT_MODEL names one.
+    STAGE_MODELS = {
+        "stage1": None,
+        "stage2": GAP_ANALYSIS_LIGHT_MODEL,
+        "stage3": GAP_ANALYSIS_LIGHT_MODEL,
+        "stage4": GAP_ANALYSIS_LIGHT_MODEL,
+        "stages234": GAP_ANALYSIS_LIGHT_MODEL,
+        "stage5": None,
+    }
+
+    # Response token budget per stage
+    STAGE_MAX_TOKENS = {
+        "stage1": 4000,
+        "stage1_merge": 2000,
+        "stage2": 1500,
+        "stage3": 1500,
+        "stage4": 1500,
+        "stages234": 4500,
+        "stage5": 4000,
+    }
+
+    STAGE_5_SYSTEM_MESSAGE = (
+        "You are a knowledge transfer specialist. Generate specific, high-impact questions. "
+        "Respond only with valid JSON."
+    )
+
     def __init__(self, client=None):
         """
         Initialize the Multi-Stage Gap Analyzer.
@@ -436,7 +814,10 @@ Focus on what would cause the MOST PROBLEMS if the employee left tomorrow withou
         self,
         documents: List[DocumentContext],
         max_docs_per_stage: int = 30,
-        temperature: float = 0.4
+        temperature: float = 0.4,
+        fused: bool = True,
+        extraction_temperature: float = 0.2,
+        token_budget: Optional[int] = 60000
     ) -> MultiStageAnalysisResult:
         """
         Run the full 5-stage analysis on a document corpus.
@@ -444,7 +825,12 @@ Focus on what would cause the MOST PROBLEMS if the employee left tomorrow withou
         Args:
             documents: List of DocumentContext objects to analyze
             max_docs_per_stage: Maximum documents to include per stage
-            temperature: LLM temperature for generation
+            temperature: LLM temperature for Stage 5 question generation
+            fused: Run Stages 2-4 as one LLM call (False = three separate calls)
+            extraction_temperature: LLM temperature for the extraction Stages 1-4
+            token_budget: Cap on document content tokens; longer documents
+                are cut to fit (None = send documents whole). Budgets above
+                STAGE_1_TOKEN_BUDGET run Stage 1 in shards.
 
         Returns:
             MultiStageAnalysisResult with all stages and synthesized questions
@@ -452,30 +838,23 @@ Focus on what would cause the MOST PROBLEMS if the employee left tomorrow withou
         logger.info(f"Starting multi-stage analysis on {len(documents)} documents")
 
         # Prepare document text
-        full_doc_text = self._prepare_documents(documents, max_docs_per_stage)
-        sample_doc_text = self._prepare_documents(documents[:min(10, len(documents))], 10)
+        doc_texts, sample_doc_text = self._prepare_documents(
+            documents, max_docs_per_stage, token_budget
+        )
 
         # Stage 1: Corpus Understanding
         logger.info("Stage 1: Corpus Understanding")
-        corpus_understanding = self._run_stage_1(full_doc_text, temperature)
-
-        # Stage 2: Expert Mind Simulation
-        logger.info("Stage 2: Expert Mind Simulation")
-        expert_insights = self._run_stage_2(
-            corpus_understanding, sample_doc_text, temperature
-        )
-
-        # Stage 3: New Hire Simulation
-        logger.info("Stage 3: New Hire Simulation")
-        new_hire_blockers = self._run_stage_3(
-            corpus_understanding, sample_doc_text, temperature
-        )
+        corpus_understanding = self._understand_corpus(doc_texts, extraction_temperature)
 
-        # Stage 4: Failure Mode Analysis
-        logger.info("Stage 4: Failure Mode Analysis")
-        failure_modes = self._run_stage_4(
-            corpus_understanding, sample_doc_text, temperature
-        )
+        if fused:
+            logger.info("Stages 2-4: Expert Mind, New Hire and Failure Mode Simulation (fused)")
+            expert_insights, new_hire_blockers, failure_modes = self._run_stages_234(
+                corpus_understanding, sample_doc_text, extraction_temperature
+            )
+        else:
+            expert_insights, new_hire_blockers, failure_modes = self._run_stages_234_separately(
+                corpus_understanding, sample_doc_text, extraction_temperature
+            )
 
         # Stage 5: Question Synthesis
         logger.info("Stage 5: Question Synthesis")
@@ -493,7 +872,7 @@ Focus on what would cause the MOST PROBLEMS if the employee left tomorrow withou
             synthesized_questions=synthesized_questions,
             analysis_metadata={
                 "documents_analyzed": len(documents),
-                "analysis_timestamp": datetime.utcnow().isoformat(),
+                "analysis_timestamp": datetime.now(timezone.utc).isoformat(),
                 "stages_completed": 5
             }
         )
@@ -504,35 +883,199 @@ Focus on what would cause the MOST PROBLEMS if the employee left tomorrow withou
     def _prepare_documents(
         self,
         documents: List[DocumentContext],
-        max_docs: int
-    ) -> str:
-        """Prepare documents for LLM consumption."""
-        selected = documents[:max_docs]
-        return "\n\n---\n\n".join([
-            doc.to_analysis_text() for doc in selected
-        ])
+        max_docs: int,
+        token_budget: Optional[int] = None,
+        sample_docs: int = 10
+    ) -> tuple:
+        """
+        Prepare documents for LLM consumption.
+
+        Returns (analysis text of each of the first max_docs documents,
+        joined sample text of the first sample_docs). Each document is
+        formatted once; the sample reuses the per-document strings. When
+        the documents' content exceeds token_budget, each is cut to its
+        share of it (see _allocate_token_budget).
+        """
+        selected = documents[:max(max_docs, sample_docs)]
+        if token_budget is None:
+            texts = [doc.to_analysis_text() for doc in selected]
+        else:
+            token_counts = [count_tokens(doc.content) for doc in selected]
+            allocation = _allocate_token_budget(token_counts, token_budget)
+            texts = []
+            for doc, tokens, allowed in zip(selected, token_counts, allocation):
+                max_length = None
+                if allowed < tokens:
+                    # Convert the token share to characters at this document's own ratio
+                    max_length = max(1, len(doc.content) * allowed // tokens)
+                texts.append(doc.to_analysis_text(max_length))
+        return texts[:max_docs], DOCUMENT_SEPARATOR.join(texts[:sample_docs])
 
     def _call_llm(
         self,
         prompt: str,
         system_message: str,
-        temperature: float
+        temperature: float,
+        max_tokens: int = 4000,
+        model: Optional[str] = None,
+        schema: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Call LLM and parse JSON response."""
+        """
+        Call LLM and parse JSON response, reusing a recent identical call.
+
+        schema names the STAGE_SCHEMAS entry the response must follow
+        (None = any JSON object). model overrides the client's default chat
+        model; if that call fails or returns no JSON, it is retried once on
+        the default model. Raises
+        LLMCallError (or the API error) if the default model fails, rather
+        than letting an empty stage result flow into later stages.
+        """
+        cache_key = _llm_cache_key(system_message, prompt, temperature, model)
+        entry = _LLM_RESPONSE_CACHE.get(cache_key)
+        if entry and time.monotonic() - entry[0] < LLM_RESPONSE_CACHE_TTL:
+            return entry[1]
+
         try:
-            response = self.client.chat_completion(
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=temperature,
-                max_tokens=4000,
-                response_format={"type": "json_object"}
+            result = self._request_json(
+                prompt, system_message, temperature, max_tokens, model, schema
             )
-            return json.loads(response.choices[0].message.content)
         except Exception as e:
-            logger.error(f"LLM call failed: {e}")
-            return {}
+            if not model:
+                logger.error(f"LLM call failed: {e}")
+                raise
+            result = {}
+
+        if not result and model:
+            logger.warning(f"No usable response from {model}, retrying on the default model")
+            return self._call_llm(
+                prompt, system_message, temperature, max(max_tokens, 4000), schema=schema
+            )
+
+        # Failed or empty responses aren't cached, so the next run retries
+        if result:
+            _LLM_RESPONSE_CACHE.set(cache_key, (time.monotonic(), result))
+        return result
+
+    def _request_json(
+        self,
+        prompt: str,
+        system_message: str,
+        temperature: float,
+        max_tokens: int,
+        model: Optional[str],
+        schema: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Make one JSON chat completion, retrying transient failures (rate
+        limits, timeouts, server errors, malformed JSON) with exponential
+        backoff and jitter.
+        """
+        options = {"model": model} if model else {}
+        last_error = None
+        for attempt in range(LLM_CALL_ATTEMPTS):
+            if attempt:
+                delay = LLM_RETRY_BASE_DELAY * 2 ** (attempt - 1)
+                time.sleep(delay + random.uniform(0, delay / 2))
+            _wait_for_rate_limit(prompt, max_tokens)
+            try:
+                response = self.client.chat_completion(
+                    messages=[
+                        {"role": "system", "content": system_message},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    response_format=_response_format(schema),
+                    **options
+                )
+                return json.loads(response.choices[0].message.content)
+            except _RETRYABLE_LLM_ERRORS as e:
+                last_error = e
+                logger.warning(f"LLM call failed (attempt {attempt + 1}/{LLM_CALL_ATTEMPTS}): {e}")
+
+        raise LLMCallError(
+            f"LLM call failed after {LLM_CALL_ATTEMPTS} attempts: {last_error}"
+        ) from last_error
+
+    def _understand_corpus(
+        self,
+        doc_texts: List[str],
+        temperature: float
+    ) -> CorpusUnderstanding:
+        """
+        Run Stage 1 over the documents: in one call when they fit
+        STAGE_1_TOKEN_BUDGET, otherwise map-reduced over document shards.
+        """
+        token_counts = [count_tokens(text) for text in doc_texts]
+        if sum(token_counts) <= STAGE_1_TOKEN_BUDGET:
+            return self._run_stage_1(DOCUMENT_SEPARATOR.join(doc_texts), temperature)
+
+        # Pack documents in order into shards of at most STAGE_1_SHARD_TOKENS;
+        # a document larger than that gets a shard of its own
+        shards = []
+        shard, shard_tokens = [], 0
+        for text, tokens in zip(doc_texts, token_counts):
+            if shard and shard_tokens + tokens > STAGE_1_SHARD_TOKENS:
+                shards.append(shard)
+                shard, shard_tokens = [], 0
+            shard.append(text)
+            shard_tokens += tokens
+        shards.append(shard)
+
+        logger.info(
+            f"Stage 1: {sum(token_counts)} tokens over budget, "
+            f"map-reducing across {len(shards)} shards"
+        )
+        with ThreadPoolExecutor(
+            max_workers=min(STAGE_1_PARALLEL_SHARDS, len(shards))
+        ) as executor:
+            partials = list(executor.map(
+                lambda shard: self._run_stage_1(DOCUMENT_SEPARATOR.join(shard), temperature),
+                shards
+            ))
+
+        return self._merge_understandings(partials, temperature)
+
+    def _merge_understandings(
+        self,
+        partials: List[CorpusUnderstanding],
+        temperature: float
+    ) -> CorpusUnderstanding:
+        """
+        Reduce per-shard Stage 1 results into one CorpusUnderstanding.
+
+        Lists are concatenated with duplicates removed (named items by
+        name); the prose fields are rewritten from the shard summaries by
+        one small LLM call.
+        """
+        merged = CorpusUnderstanding(
+            key_entities=_dedupe_items(e for p in partials for e in p.key_entities),
+            projects=_dedupe_items(e for p in partials for e in p.projects),
+            people=_dedupe_items(e for p in partials for e in p.people),
+            technologies=_dedupe_items(e for p in partials for e in p.technologies),
+            processes=_dedupe_items(e for p in partials for e in p.processes),
+            timeline=_dedupe_items(e for p in partials for e in p.timeline),
+            relationships=_dedupe_items(e for p in partials for e in p.relationships)
+        )
+
+        shard_summaries = "\n\n".join(
+            f"[Part {i}]\nDomain: {p.domain_context}\n"
+            f"Organization: {p.organizational_structure}\nSummary: {p.raw_summary}"
+            for i, p in enumerate(partials, 1)
+        )
+        result = self._call_llm(
+            self.STAGE_1_MERGE_PROMPT.format(shard_summaries=shard_summaries),
+            "You are an expert knowledge analyst. Respond only with valid JSON.",
+            temperature,
+            max_tokens=self.STAGE_MAX_TOKENS["stage1_merge"],
+            schema="stage1_merge",
+            model=self.STAGE_MODELS["stage1"]
+        )
+
+        merged.domain_context = result.get("domain_context", "")
+        merged.organizational_structure = result.get("organizational_structure", "")
+        merged.raw_summary = result.get("raw_summary", "")
+        return merged
 
     def _run_stage_1(
         self,
@@ -545,38 +1088,118 @@ Focus on what would cause the MOST PROBLEMS if the employee left tomorrow withou
         result = self._call_llm(
             prompt,
             "You are an expert knowledge analyst. Respond only with valid JSON.",
-            temperature
+            temperature,
+            max_tokens=self.STAGE_MAX_TOKENS["stage1"],
+            schema="stage1",
+            model=self.STAGE_MODELS["stage1"]
         )
 
-        return CorpusUnderstanding(
-            key_entities=result.get("key_entities", []),
-            projects=result.get("projects", []),
-            people=result.get("people", []),
-            technologies=result.get("technologies", []),
-            processes=result.get("processes", []),
-            timeline=result.get("timeline", []),
-            relationships=result.get("relationships", []),
-            domain_context=result.get("domain_context", ""),
-            organizational_structure=result.get("organizational_structure", ""),
-            raw_summary=result.get("raw_summary", "")
-        )
+        return _from_json(CorpusUnderstanding, result)
 
-    def _run_stage_2(
+    def _run_stages_234(
         self,
         corpus_understanding: CorpusUnderstanding,
         documents_sample: str,
         temperature: float
-    ) -> ExpertInsight:
-        """Run Stage 2: Expert Mind Simulation."""
-        # Summarize corpus understanding for prompt
-        corpus_summary = json.dumps({
+    ) -> tuple:
+        """Run Stages 2-4 as one LLM call over a shared corpus context."""
+        corpus_summary = _compact_json({
             "domain": corpus_understanding.domain_context,
+            "org_structure": corpus_understanding.organizational_structure,
             "key_entities": corpus_understanding.key_entities[:10],
             "projects": corpus_understanding.projects[:5],
-            "technologies": corpus_understanding.technologies[:10],
+            "people": corpus_understanding.people[:10],
+            "technologies": corpus_understanding.technologies,
+            "processes": corpus_understanding.processes,
             "summary": corpus_understanding.raw_summary
-        }, indent=2)
+        })
 
+        prompt = self.STAGE_234_PROMPT.format(
+            corpus_understanding=corpus_summary,
+            documents_sample=documents_sample
+        )
+
+        result = self._call_llm(
+            prompt,
+            "You are an organizational analyst who takes the perspective of a departing expert, "
+            "a confused new hire and a reliability engineer in turn. Respond only with valid JSON.",
+            temperature,
+            max_tokens=self.STAGE_MAX_TOKENS["stages234"],
+            schema="stages234",
+            model=self.STAGE_MODELS["stages234"]
+        )
+
+        return (
+            _from_json(ExpertInsight, result.get("expert")),
+            _from_json(NewHireBlockers, result.get("newhire")),
+            _from_json(FailureModeInsight, result.get("failure"))
+        )
+
+    def _run_stages_234_separately(
+        self,
+        corpus_understanding: CorpusUnderstanding,
+        documents_sample: str,
+        temperature: float
+    ) -> tuple:
+        """Run Stages 2-4 as three concurrent LLM calls."""
+        # Stages 2-4 each depend only on Stage 1, so their LLM calls run
+        # concurrently on corpus summaries serialized up front
+        logger.info("Stages 2-4: Expert Mind, New Hire and Failure Mode Simulation")
+        summaries = self._build_shared_context(corpus_understanding)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            # Stage 2: Expert Mind Simulation
+            expert_future = executor.submit(
+                self._run_stage_2, summaries["stage2"], documents_sample, temperature
+            )
+            # Stage 3: New Hire Simulation
+            new_hire_future = executor.submit(
+                self._run_stage_3, summaries["stage3"], documents_sample, temperature
+            )
+            # Stage 4: Failure Mode Analysis
+            failure_future = executor.submit(
+                self._run_stage_4, summaries["stage4"], documents_sample, temperature
+            )
+
+            expert_insights = expert_future.result()
+            new_hire_blockers = new_hire_future.result()
+            failure_modes = failure_future.result()
+
+        return expert_insights, new_hire_blockers, failure_modes
+
+    @staticmethod
+    def _build_shared_context(corpus_understanding: CorpusUnderstanding) -> Dict[str, str]:
+        """
+        Serialize the slice of the Stage 1 result each of Stages 2, 3 and 4
+        is prompted with, keyed "stage2".."stage4".
+        """
+        return {
+            "stage2": _compact_json({
+                "domain": corpus_understanding.domain_context,
+                "key_entities": corpus_understanding.key_entities[:10],
+                "projects": corpus_understanding.projects[:5],
+                "technologies": corpus_understanding.technologies[:10],
+                "summary": corpus_understanding.raw_summary
+            }),
+            "stage3": _compact_json({
+                "domain": corpus_understanding.domain_context,
+                "org_structure": corpus_understanding.organizational_structure,
+                "people": corpus_understanding.people[:10],
+                "processes": corpus_understanding.processes[:10]
+            }),
+            "stage4": _compact_json({
+                "technologies": corpus_understanding.technologies,
+                "processes": corpus_understanding.processes,
+                "projects": [p.get("name") for p in corpus_understanding.projects[:10]]
+            })
+        }
+
+    def _run_stage_2(
+        self,
+        corpus_summary: str,
+        documents_sample: str,
+        temperature: float
+    ) -> ExpertInsight:
+        """Run Stage 2: Expert Mind Simulation on its corpus summary."""
         prompt = self.STAGE_2_PROMPT.format(
             corpus_understanding=corpus_summary,
             documents_sample=documents_sample
@@ -585,31 +1208,21 @@ Focus on what would cause the MOST PROBLEMS if the employee left tomorrow withou
         result = self._call_llm(
             prompt,
             "You are simulating an expert with years of institutional knowledge. Respond only with valid JSON.",
-            temperature
+            temperature,
+            max_tokens=self.STAGE_MAX_TOKENS["stage2"],
+            schema="stage2",
+            model=self.STAGE_MODELS["stage2"]
         )
 
-        return ExpertInsight(
-            tacit_knowledge_gaps=result.get("tacit_knowledge_gaps", []),
-            tribal_knowledge=result.get("tribal_knowledge", []),
-            unwritten_assumptions=result.get("unwritten_assumptions", []),
-            expertise_areas=result.get("expertise_areas", []),
-            implicit_decisions=result.get("implicit_decisions", [])
-        )
+        return _from_json(ExpertInsight, result)
 
     def _run_stage_3(
         self,
-        corpus_understanding: CorpusUnderstanding,
+        corpus_summary: str,
         documents_sample: str,
         temperature: float
     ) -> NewHireBlockers:
-        """Run Stage 3: New Hire Simulation."""
-        corpus_summary = json.dumps({
-            "domain": corpus_understanding.domain_context,
-            "org_structure": corpus_understanding.organizational_structure,
-            "people": corpus_understanding.people[:10],
-            "processes": corpus_understanding.processes[:10]
-        }, indent=2)
-
+        """Run Stage 3: New Hire Simulation on its corpus summary."""
         prompt = self.STAGE_3_PROMPT.format(
             corpus_understanding=corpus_summary,
             documents_sample=documents_sample
@@ -618,31 +1231,21 @@ Focus on what would cause the MOST PROBLEMS if the employee left tomorrow withou
         result = self._call_llm(
             prompt,
             "You are a confused new employee trying to understand the organization. Respond only with valid JSON.",
-            temperature
+            temperature,
+            max_tokens=self.STAGE_MAX_TOKENS["stage3"],
+            schema="stage3",
+            model=self.STAGE_MODELS["stage3"]
         )
 
-        return NewHireBlockers(
-            context_gaps=result.get("context_gaps", []),
-            vocabulary_terms=result.get("vocabulary_terms", []),
-            relationship_gaps=result.get("relationship_gaps", []),
-            process_gaps=result.get("process_gaps", []),
-            tool_knowledge_gaps=result.get("tool_knowledge_gaps", []),
-            onboarding_blockers=result.get("onboarding_blockers", [])
-        )
+        return _from_json(NewHireBlockers, result)
 
     def _run_stage_4(
         self,
-        corpus_understanding: CorpusUnderstanding,
+        corpus_summary: str,
         documents_sample: str,
         temperature: float
     ) -> FailureModeInsight:
-        """Run Stage 4: Failure Mode Analysis."""
-        corpus_summary = json.dumps({
-            "technologies": corpus_understanding.technologies,
-            "processes": corpus_understanding.processes,
-            "projects": [p.get("name") for p in corpus_understanding.projects[:10]]
-        }, indent=2)
-
+        """Run Stage 4: Failure Mode Analysis on its corpus summary."""
         prompt = self.STAGE_4_PROMPT.format(
             corpus_understanding=corpus_summary,
             documents_sample=documents_sample
@@ -651,16 +1254,13 @@ Focus on what would cause the MOST PROBLEMS if the employee left tomorrow withou
         result = self._call_llm(
             prompt,
             "You are a reliability engineer analyzing failure modes. Respond only with valid JSON.",
-            temperature
+            temperature,
+            max_tokens=self.STAGE_MAX_TOKENS["stage4"],
+            schema="stage4",
+            model=self.STAGE_MODELS["stage4"]
         )
 
-        return FailureModeInsight(
-            documented_procedures=result.get("documented_procedures", []),
-            missing_recovery_steps=result.get("missing_recovery_steps", []),
-            edge_cases=result.get("edge_cases", []),
-            escalation_gaps=result.get("escalation_gaps", []),
-            undocumented_workarounds=result.get("undocumented_workarounds", [])
-        )
+        return _from_json(FailureModeInsight, result)
 
     def _run_stage_5(
         self,
@@ -671,92 +1271,173 @@ Focus on what would cause the MOST PROBLEMS if the employee left tomorrow withou
         temperature: float
     ) -> List[SynthesizedQuestion]:
         """Run Stage 5: Question Synthesis."""
-        # Prepare summaries
-        corpus_summary = f"""
-Domain: {corpus_understanding.domain_context}
-Organization: {corpus_understanding.organizational_structure}
-Key Projects: {', '.join(p.get('name', '') for p in corpus_understanding.projects[:10])}
-Technologies: {', '.join(corpus_understanding.technologies[:15])}
-Key People: {', '.join(p.get('name', '') + ' (' + p.get('role', '') + ')' for p in corpus_understanding.people[:10])}
-Summary: {corpus_understanding.raw_summary[:1000]}
-"""
-
-        expert_summary = f"""
-Tacit Knowledge Gaps:
-{chr(10).join('- ' + g for g in expert_insights.tacit_knowledge_gaps[:10])}
-
-Tribal Knowledge:
-{chr(10).join('- ' + k for k in expert_insights.tribal_knowledge[:10])}
-
-Unwritten Assumptions:
-{chr(10).join('- ' + a for a in expert_insights.unwritten_assumptions[:10])}
-
-Implicit Decisions:
-{chr(10).join('- ' + d for d in expert_insights.implicit_decisions[:10])}
-"""
-
-        newhire_summary = f"""
-Context Gaps:
-{chr(10).join('- ' + g for g in new_hire_blockers.context_gaps[:10])}
-
-Undefined Terms:
-{chr(10).join('- ' + t for t in new_hire_blockers.vocabulary_terms[:10])}
-
-Process Gaps:
-{chr(10).join('- ' + p for p in new_hire_blockers.process_gaps[:10])}
+        prompt = self._stage_5_prompt(
+            corpus_understanding, expert_insights, new_hire_blockers, failure_modes
+        )
 
-Onboarding Blockers:
-{chr(10).join('- ' + b for b in new_hire_blockers.onboarding_blockers[:10])}
-"""
+        result = self._call_llm(
+            prompt,
+            self.STAGE_5_SYSTEM_MESSAGE,
+            temperature,
+            max_tokens=self.STAGE_MAX_TOKENS["stage5"],
+            schema="stage5",
+            model=self.STAGE_MODELS["stage5"]
+        )
 
-        failure_summary = f"""
-Missing Recovery Steps:
-{chr(10).join('- ' + s for s in failure_modes.missing_recovery_steps[:10])}
+        questions = [self._synthesized_question(q) for q in result.get("questions", [])]
 
-Edge Cases:
-{chr(10).join('- ' + e for e in failure_modes.edge_cases[:10])}
+        # Sort by priority (highest first)
+        questions.sort(key=lambda q: q.priority, reverse=True)
 
-Escalation Gaps:
-{chr(10).join('- ' + g for g in failure_modes.escalation_gaps[:10])}
+        return self._deduplicate_questions(questions)
 
-Undocumented Workarounds:
-{chr(10).join('- ' + w for w in failure_modes.undocumented_workarounds[:10])}
-"""
+    def _deduplicate_questions(
+        self,
+        questions: List[SynthesizedQuestion]
+    ) -> List[SynthesizedQuestion]:
+        """
+        Drop questions that paraphrase an earlier (higher-priority) one.
+
+        Questions are embedded in one request and a question is dropped when
+        its cosine similarity to a kept question exceeds
+        QUESTION_SIMILARITY_THRESHOLD. Near-verbatim repeats are dropped
+        first by trigram overlap, which needs no embeddings. A dropped
+        question's related entities and answerers move to the one kept. If
+        embedding fails, the questions left after the trigram pass are kept.
+        """
+        questions = self._drop_repeated_questions(questions)
+        if len(questions) < 2:
+            return questions
+
+        texts = [q.question for q in questions]
+        keys = [question_hash(text) for text in texts]
+        vectors = [_QUESTION_EMBEDDING_CACHE.get(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        try:
+            if missing:
+                response = self.client.create_embedding(
+                    text=[texts[i] for i in missing],
+                    dimensions=QUESTION_EMBEDDING_DIMENSIONS
+                )
+                for i, emb in zip(missing, response.data):
+                    vectors[i] = np.asarray(emb.embedding, dtype=np.float32)
+                    _QUESTION_EMBEDDING_CACHE.set(keys[i], vectors[i])
+            embeddings = np.stack(vectors)
+        except Exception as e:
+            logger.warning(f"Question deduplication skipped, embedding failed: {e}")
+            return questions
+
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-8
+        similarity = embeddings @ embeddings.T
+
+        # Greedy in priority order: keep a question unless it is too close to
+        # one already kept
+        kept = []
+        for i in range(len(questions)):
+            if not kept:
+                kept.append(i)
+                continue
+            closest = int(np.argmax(similarity[i, kept]))
+            if similarity[i, kept[closest]] <= QUESTION_SIMILARITY_THRESHOLD:
+                kept.append(i)
+            else:
+                _merge_question(questions[kept[closest]], questions[i])
+
+        if len(kept) < len(questions):
+            logger.info(f"Dropped {len(questions) - len(kept)} near-duplicate questions")
+        return [questions[i] for i in kept]
+
+    @staticmethod
+    def _drop_repeated_questions(
+        questions: List[SynthesizedQuestion]
+    ) -> List[SynthesizedQuestion]:
+        """
+        Drop questions whose trigram Jaccard similarity to an earlier kept
+        question reaches QUESTION_SHINGLE_THRESHOLD.
+        """
+        kept = []
+        kept_shingles = []
+        for q in questions:
+            shingles = _question_shingles(q.question)
+            for survivor, survivor_shingles in zip(kept, kept_shingles):
+                overlap = len(shingles & survivor_shingles)
+                if overlap >= QUESTION_SHINGLE_THRESHOLD * len(shingles | survivor_shingles):
+                    _merge_question(survivor, q)
+                    break
+            else:
+                kept.append(q)
+                kept_shingles.append(shingles)
+
+        if len(kept) < len(questions):
+            logger.info(f"Dropped {len(questions) - len(kept)} repeated questions")
+        return kept
+
+    @staticmethod
+    def _synthesized_question(q: Dict[str, Any]) -> SynthesizedQuestion:
+        """Build a SynthesizedQuestion from one Stage 5 JSON entry."""
+        return SynthesizedQuestion(
+            question=q.get("question", ""),
+            category=q.get("category", "context"),
+            priority=min(max(q.get("priority", 3), 1), 5),
+            reasoning=q.get("reasoning", ""),
+            source_stage=q.get("source_stage", "synthesis"),
+            related_entities=q.get("related_entities", []),
+            answerable_by=q.get("answerable_by", [])
+        )
 
-        prompt = self.STAGE_5_PROMPT.format(
+    def _stage_5_prompt(
+        self,
+        corpus_understanding: CorpusUnderstanding,
+        expert_insights: ExpertInsight,
+        new_hire_blockers: NewHireBlockers,
+        failure_modes: FailureModeInsight
+    ) -> str:
+        """Build the Stage 5 prompt from the Stage 1-4 results."""
+        # Prepare summaries
+        corpus_summary = "\n".join((
+            f"Domain: {corpus_understanding.domain_context}",
+            f"Organization: {corpus_understanding.organizational_structure}",
+            "Key Projects: " + ", ".join(p.get("name", "") for p in corpus_understanding.projects[:10]),
+            "Technologies: " + ", ".join(corpus_understanding.technologies[:15]),
+            "Key People: " + ", ".join(
+                f"{p.get('name', '')} ({p.get('role', '')})" for p in corpus_understanding.people[:10]
+            ),
+            f"Summary: {corpus_understanding.raw_summary[:1000]}"
+        ))
+
+        expert_summary = _bullet_sections((
+            ("Tacit Knowledge Gaps", expert_insights.tacit_knowledge_gaps),
+            ("Tribal Knowledge", expert_insights.tribal_knowledge),
+            ("Unwritten Assumptions", expert_insights.unwritten_assumptions),
+            ("Implicit Decisions", expert_insights.implicit_decisions),
+        ))
+
+        newhire_summary = _bullet_sections((
+            ("Context Gaps", new_hire_blockers.context_gaps),
+            ("Undefined Terms", new_hire_blockers.vocabulary_terms),
+            ("Process Gaps", new_hire_blockers.process_gaps),
+            ("Onboarding Blockers", new_hire_blockers.onboarding_blockers),
+        ))
+
+        failure_summary = _bullet_sections((
+            ("Missing Recovery Steps", failure_modes.missing_recovery_steps),
+            ("Edge Cases", failure_modes.edge_cases),
+            ("Escalation Gaps", failure_modes.escalation_gaps),
+            ("Undocumented Workarounds", failure_modes.undocumented_workarounds),
+        ))
+
+        return self.STAGE_5_PROMPT.format(
             corpus_understanding=corpus_summary,
             expert_insights=expert_summary,
             new_hire_blockers=newhire_summary,
             failure_modes=failure_summary
         )
 
-        result = self._call_llm(
-            prompt,
-            "You are a knowledge transfer specialist. Generate specific, high-impact questions. Respond only with valid JSON.",
-            temperature
-        )
-
-        questions = []
-        for q in result.get("questions", []):
-            questions.append(SynthesizedQuestion(
-                question=q.get("question", ""),
-                category=q.get("category", "context"),
-                priority=min(max(q.get("priority", 3), 1), 5),
-                reasoning=q.get("reasoning", ""),
-                source_stage=q.get("source_stage", "synthesis"),
-                related_entities=q.get("related_entities", []),
-                answerable_by=q.get("answerable_by", [])
-            ))
-
-        # Sort by priority (highest first)
-        questions.sort(key=lambda q: q.priority, reverse=True)
-
-        return questions
-
     def to_knowledge_gaps(
         self,
         result: MultiStageAnalysisResult,
-        project_id: Optional[str] = None
+        project_id: Optional[str] = None,
+        top_k: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Convert analysis result to knowledge gap format for database storage.
@@ -764,45 +1445,83 @@ Undocumented Workarounds:
         Args:
             result: MultiStageAnalysisResult from analyze()
             project_id: Optional project ID to associate gaps with
+            top_k: Keep only each category's top_k highest-priority
+                   questions (None = all)
 
         Returns:
             List of gap dictionaries ready for database insertion
         """
-        gaps = []
+        return list(self.iter_knowledge_gaps(result, project_id, top_k))
 
-        # Group questions by category for better organization
+    def iter_knowledge_gaps(
+        self,
+        result: MultiStageAnalysisResult,
+        project_id: Optional[str] = None,
+        top_k: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the gap dictionaries of to_knowledge_gaps() one at a time, for
+        callers that consume them in a single pass.
+        """
+        # Group questions by category for better organization, skipping
+        # blank ones so no gap is built from empty questions
         by_category: Dict[str, List[SynthesizedQuestion]] = {}
         for q in result.synthesized_questions:
+            if not q.question.strip():
+                continue
             if q.category not in by_category:
                 by_category[q.category] = []
             by_category[q.category].append(q)
 
+        # The analysis context is the same for every gap, so all of them
+        # share one dict (it is only serialized into the gap rows)
+        context = {
+            "corpus_summary": result.corpus_understanding.raw_summary[:500],
+            "analysis_timestamp": result.analysis_metadata.get("analysis_timestamp"),
+            "documents_analyzed": result.analysis_metadata.get("documents_analyzed"),
+            "source": "multi_stage_llm_analysis"
+        }
+
         for category, questions in by_category.items():
+            if top_k and len(questions) > top_k:
+                # nlargest is stable, so equal priorities keep their order
+                questions = heapq.nlargest(top_k, questions, key=lambda q: q.priority)
+
+            # One pass builds the question entries and finds the top priority
+            question_entries = []
+            max_priority = 0
+            for q in questions:
+                question_entries.append({
+                    "text": q.question,
+                    "content_hash": question_hash(q.question),
+                    "answered": False,
+                    "priority": q.priority,
+                    "reasoning": q.reasoning,
+                    "related_entities": q.related_entities,
+                    "answerable_by": q.answerable_by
+                })
+                if q.priority > max_priority:
+                    max_priority = q.priority
+
             # Create one gap per category with multiple questions
             gap = {
                 "title": f"{category.title()} Knowledge Gap",
                 "description": f"Questions about {category} knowledge identified through multi-stage analysis.",
                 "category": category,
-                "priority": max(q.priority for q in questions),
-                "questions": [
-                    {
-                        "text": q.question,
-                        "answered": False,
-                        "priority": q.priority,
-                        "reasoning": q.reasoning,
-                        "related_entities": q.related_entities,
-                        "answerable_by": q.answerable_by
-                    }
-                    for q in questions
-                ],
-                "context": {
-                    "corpus_summary": result.corpus_understanding.raw_summary[:500],
-                    "analysis_timestamp": result.analysis_metadata.get("analysis_timestamp"),
-                    "documents_analyzed": result.analysis_metadata.get("documents_analyzed"),
-                    "source": "multi_stage_llm_analysis"
-                },
+                "priority": max_priority,
+                "questions": question_entries,
+                "context": context,
                 "project_id": project_id
             }
-            gaps.append(gap)
+            yield gap
+
+
+# Singleton instance (the analyzer keeps no per-analysis state)
+_analyzer = None
 
-        return gaps
+def get_multistage_gap_analyzer() -> MultiStageGapAnalyzer:
+    """Get or create the shared MultiStageGapAnalyzer"""
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = MultiStageGapAnalyzer()
+    return _analyzer
@@ -16,6 +16,7 @@ from typing import List, Dict, Optional, Tuple, Any, Callable
 from dataclasses import dataclass
 from pathlib import Path
 from enum import Enum
+from concurrent.futures import ThreadPoolExecutor
 import time
 
 from sqlalchemy.orm import Session
@@ -69,6 +70,8 @@ except ImportError:
 AZURE_TTS_KEY = os.getenv("AZURE_TTS_KEY", os.getenv("AZURE_OPENAI_API_KEY"))
 AZURE_TTS_REGION = os.getenv("AZURE_TTS_REGION", "eastus2")
 AZURE_TTS_VOICE = os.getenv("AZURE_TTS_VOICE", "en-US-JennyNeural")
+# Slides narrated at once, each on its own reused synthesizer connection
+AZURE_TTS_CONCURRENCY = int(os.getenv("AZURE_TTS_CONCURRENCY", "3"))
 
 
 @dataclass
@@ -788,17 +791,21 @@ Respond in JSON format:
                 speechsdk.SpeechSynthesisOutputFormat.Audio16Khz32KBitRateMonoMp3
             )
 
-            for i, slide in enumerate(slides):
-                output_path = output_dir / f"audio_{i}.mp3"
-
-                audio_config = speechsdk.audio.AudioOutputConfig(
-                    filename=str(output_path)
-                )
-
+            # A small pool of synthesizers with audio kept in memory, so each
+            # one (and its service connection) is reused across slides
+            workers = max(1, min(AZURE_TTS_CONCURRENCY, len(slides)))
+            synthesizers = queue.Queue()
+            for _ in range(workers):
                 synthesizer = speechsdk.SpeechSynthesizer(
                     speech_config=speech_config,
-                    audio_config=audio_config
+                    audio_config=None
                 )
+                # Open the connection now rather than on the first slide
+                speechsdk.Connection.from_speech_synthesizer(synthesizer).open(True)
+                synthesizers.put(synthesizer)
+
+            def synthesize(i: int, slide: SlideContent) -> Optional[str]:
+                output_path = output_dir / f"audio_{i}.mp3"
 
                 # Use SSML for better control
                 ssml = f"""
@@ -811,13 +818,24 @@ Respond in JSON format:
 </speak>
 """
 
-                result = synthesizer.speak_ssml_async(ssml).get()
+                synthesizer = synthesizers.get()
+                try:
+                    result = synthesizer.speak_ssml_async(ssml).get()
+                except Exception as e:
+                    print(f"TTS error on slide {i}: {e}")
+                    return None
+                finally:
+                    synthesizers.put(synthesizer)
 
                 if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-                    audio_files.append(str(output_path))
-                else:
-                    # Fallback: create silent audio
-                    audio_files.append(None)
+                    output_path.write_bytes(result.audio_data)
+                    return str(output_path)
+                # Fallback: create silent audio
+                return None
+
+            # Synthesis is network-bound, so slides are narrated concurrently
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                audio_files = list(executor.map(synthesize, range(len(slides)), slides))
 
         except ImportError:
             # Azure SDK not available, use gTTS fallback
@@ -49,7 +49,7 @@ def analyze_gaps_task(
                 tenant_id=tenant_id,
                 project_id=project_id,
                 max_documents=100,
-                force=force
+                force_reanalyze=force
             )
 
         elif mode == 'v3':
@@ -57,7 +57,7 @@ def analyze_gaps_task(
             result = service.analyze_gaps_v3(
                 tenant_id=tenant_id,
                 project_id=project_id,
-                force=force
+                force_reanalyze=force
             )
 
         elif mode == 'multistage':
@@ -65,7 +65,7 @@ def analyze_gaps_task(
             result = service.analyze_gaps_multistage(
                 tenant_id=tenant_id,
                 project_id=project_id,
-                force=force
+                force_reanalyze=force
             )
 
         elif mode == 'goalfirst':
@@ -73,7 +73,7 @@ def analyze_gaps_task(
             result = service.analyze_gaps_goalfirst(
                 tenant_id=tenant_id,
                 project_id=project_id,
-                force=force
+                force_reanalyze=force
             )
 
         else:  # simple
@@ -81,7 +81,7 @@ def analyze_gaps_task(
             result = service.analyze_gaps(
                 tenant_id=tenant_id,
                 project_id=project_id,
-                force=force
+                force_reanalyze=force
             )
 
         # Update final status
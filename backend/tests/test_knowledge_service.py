@@ -0,0 +1,321 @@
+"""
+Knowledge Service Tests
+Answer submission, gap analysis caching and embedding index rebuilds.
+"""
+
+import hashlib
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database.models import (
+    Base, Tenant, Document, KnowledgeGap, GapAnalysisCache,
+    DocumentStatus, DocumentClassification, GapCategory, GapStatus
+)
+from rag.embedding_index import load_embedding_index
+import services.knowledge_service as knowledge_service
+from services.knowledge_service import KnowledgeService
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+class FakeEmbeddingClient:
+    """Stands in for the OpenAI client: deterministic vectors, counted calls"""
+
+    def __init__(self):
+        self.embedded_texts = []
+
+    @staticmethod
+    def vector_for(text: str, dimensions: int = 1536) -> np.ndarray:
+        seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=4).digest(), "big")
+        return np.random.default_rng(seed).standard_normal(dimensions).astype(np.float32)
+
+    def create_embedding(self, text, dimensions=1536):
+        texts = [text] if isinstance(text, str) else list(text)
+        self.embedded_texts.extend(texts)
+        return SimpleNamespace(data=[
+            SimpleNamespace(embedding=self.vector_for(t, dimensions).tolist()) for t in texts
+        ])
+
+    def get_embedding_model(self):
+        return "text-embedding-3-small"
+
+
+@pytest.fixture(scope="function")
+def db_session():
+    """Create a session on a fresh in-memory database"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        yield db
+    finally:
+        db.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def tenant(db_session, tmp_path):
+    """Create a tenant with its data directory under tmp_path"""
+    tenant = Tenant(
+        name="Test Corp",
+        slug="test-corp",
+        data_directory=str(tmp_path / "tenant")
+    )
+    db_session.add(tenant)
+    db_session.commit()
+    return tenant
+
+
+@pytest.fixture
+def embedding_client():
+    return FakeEmbeddingClient()
+
+
+@pytest.fixture
+def service(db_session, embedding_client, monkeypatch):
+    """KnowledgeService wired to the fake embedding client"""
+    monkeypatch.setattr(knowledge_service, "get_openai_client", lambda: embedding_client)
+    return KnowledgeService(db_session)
+
+
+def add_work_documents(db_session, tenant, count=2):
+    """Create confirmed work documents with distinct content"""
+    documents = [
+        Document(
+            tenant_id=tenant.id,
+            title=f"Design note {i}",
+            content=f"Design note {i}. The service uses approach {i} because of constraint {i}. " * 5,
+            sender="eng@example.com",
+            source_type="file",
+            status=DocumentStatus.CONFIRMED,
+            classification=DocumentClassification.WORK
+        )
+        for i in range(count)
+    ]
+    db_session.add_all(documents)
+    db_session.commit()
+    return documents
+
+
+# ============================================================================
+# TESTS: Answer Submission
+# ============================================================================
+
+class TestSubmitAnswer:
+    """Test that answers flag their question and complete the gap"""
+
+    def add_gap(self, db_session, tenant, questions):
+        gap = KnowledgeGap(
+            tenant_id=tenant.id,
+            title="Why approach 1?",
+            category=GapCategory.DECISION,
+            status=GapStatus.OPEN,
+            questions=questions
+        )
+        db_session.add(gap)
+        db_session.commit()
+        return gap.id
+
+    def test_answer_flags_question_and_last_answer_completes_gap(
+        self, db_session, tenant, service
+    ):
+        gap_id = self.add_gap(db_session, tenant, [
+            {"text": "First?", "answered": False},
+            {"text": "Second?", "answered": False}
+        ])
+
+        answer, error = service.submit_answer(gap_id, 0, "Because.", "user-1", tenant.id)
+        assert error is None
+        db_session.expire_all()
+        gap = db_session.get(KnowledgeGap, gap_id)
+        assert gap.questions[0]["answered"] is True
+        assert gap.questions[0]["answer_id"] == answer.id
+        assert gap.questions[1]["answered"] is False
+        assert gap.status == GapStatus.OPEN
+
+        _, error = service.submit_answer(gap_id, 1, "Also because.", "user-1", tenant.id)
+        assert error is None
+        db_session.expire_all()
+        gap = db_session.get(KnowledgeGap, gap_id)
+        assert all(q["answered"] for q in gap.questions)
+        assert gap.status == GapStatus.ANSWERED
+
+    def test_v3_string_questions_gain_answered_flags(self, db_session, tenant, service):
+        gap_id = self.add_gap(db_session, tenant, ["First?", "Second?"])
+
+        answer, _ = service.submit_answer(gap_id, 1, "Because.", "user-1", tenant.id)
+        assert answer.question_text == "Second?"
+        db_session.expire_all()
+        gap = db_session.get(KnowledgeGap, gap_id)
+        assert gap.questions[0] == "First?"
+        assert gap.questions[1] == {"text": "Second?", "answered": True, "answer_id": answer.id}
+        assert gap.status == GapStatus.OPEN
+
+        service.submit_answer(gap_id, 0, "Because.", "user-1", tenant.id)
+        db_session.expire_all()
+        assert db_session.get(KnowledgeGap, gap_id).status == GapStatus.ANSWERED
+
+    def test_out_of_range_question_rejected(self, db_session, tenant, service):
+        gap_id = self.add_gap(db_session, tenant, [{"text": "Only?", "answered": False}])
+
+        answer, error = service.submit_answer(gap_id, 1, "Because.", "user-1", tenant.id)
+        assert answer is None
+        assert "out of range" in error
+
+    def test_other_tenant_cannot_answer(self, db_session, tenant, service):
+        gap_id = self.add_gap(db_session, tenant, [{"text": "Only?", "answered": False}])
+
+        answer, error = service.submit_answer(gap_id, 0, "Because.", "user-1", "other-tenant")
+        assert answer is None
+        assert error == "Knowledge gap not found"
+
+
+# ============================================================================
+# TESTS: Gap Analysis Cache
+# ============================================================================
+
+class TestGapAnalysisCache:
+    """Test that unchanged corpora reuse the last analysis"""
+
+    @pytest.fixture
+    def shard_calls(self, service, monkeypatch):
+        """Replace the LLM shard call with one canned gap, counting calls"""
+        calls = []
+
+        def analyze_gap_shard(prompt):
+            calls.append(prompt)
+            return [{
+                "title": f"Gap from run {len(calls)}",
+                "category": "decision",
+                "priority": "4",
+                "questions": ["Why this approach?"]
+            }]
+
+        monkeypatch.setattr(service, "_analyze_gap_shard", analyze_gap_shard)
+        return calls
+
+    def test_unchanged_documents_reuse_last_analysis(
+        self, db_session, tenant, service, shard_calls
+    ):
+        add_work_documents(db_session, tenant)
+
+        first = service.analyze_gaps(tenant.id)
+        second = service.analyze_gaps(tenant.id)
+
+        assert len(shard_calls) == 1
+        assert first.gaps and second.gaps == first.gaps
+        assert db_session.query(KnowledgeGap).count() == 1
+
+    def test_edited_document_misses(self, db_session, tenant, service, shard_calls):
+        documents = add_work_documents(db_session, tenant)
+        service.analyze_gaps(tenant.id)
+
+        documents[0].content += " Revised."
+        db_session.commit()
+        service.analyze_gaps(tenant.id)
+
+        assert len(shard_calls) == 2
+
+    def test_answered_gap_invalidates(self, db_session, tenant, service, shard_calls):
+        add_work_documents(db_session, tenant)
+        first = service.analyze_gaps(tenant.id)
+
+        service.submit_answer(first.gaps[0]["id"], 0, "Because.", "user-1", tenant.id)
+        service.analyze_gaps(tenant.id)
+
+        assert len(shard_calls) == 2
+
+    def test_force_reanalyze_bypasses_cache(self, db_session, tenant, service, shard_calls):
+        add_work_documents(db_session, tenant)
+        service.analyze_gaps(tenant.id)
+        service.analyze_gaps(tenant.id, force_reanalyze=True)
+
+        assert len(shard_calls) == 2
+
+    def test_entry_replaced_in_place_without_touching_tenant(
+        self, db_session, tenant, service, shard_calls
+    ):
+        documents = add_work_documents(db_session, tenant)
+        updated_at = tenant.updated_at
+        service.analyze_gaps(tenant.id)
+        documents[0].content += " Revised."
+        db_session.commit()
+        second = service.analyze_gaps(tenant.id)
+
+        entries = db_session.query(GapAnalysisCache).all()
+        assert len(entries) == 1
+        assert entries[0].result["gaps"] == second.gaps
+        db_session.expire_all()
+        tenant = db_session.get(Tenant, tenant.id)
+        assert tenant.updated_at == updated_at
+        assert not (tenant.settings or {}).get("gap_analysis_cache")
+
+
+# ============================================================================
+# TESTS: Embedding Index Rebuild
+# ============================================================================
+
+class TestRebuildEmbeddingIndex:
+    """Test vector reuse across rebuilds and the saved float16 index"""
+
+    def test_rebuild_reuses_vectors_of_unchanged_chunks(
+        self, db_session, tenant, service, embedding_client
+    ):
+        documents = add_work_documents(db_session, tenant)
+
+        first = service.rebuild_embedding_index(tenant.id)
+        assert first["success"] is True
+        assert first["chunks_embedded"] == first["chunks_created"]
+        first_matrix = np.array(load_embedding_index(first["index_path"])["embeddings"])
+
+        second = service.rebuild_embedding_index(tenant.id)
+        assert second["chunks_embedded"] == 0
+        np.testing.assert_array_equal(
+            np.array(load_embedding_index(second["index_path"])["embeddings"]), first_matrix
+        )
+
+        documents[0].content = "A rewritten design note about the new approach. " * 5
+        db_session.commit()
+        embedding_client.embedded_texts.clear()
+        third = service.rebuild_embedding_index(tenant.id)
+        assert 0 < third["chunks_embedded"] < third["chunks_created"]
+        assert all("rewritten" in text for text in embedding_client.embedded_texts)
+
+    def test_float16_index_round_trips_through_enhanced_rag_v2(
+        self, db_session, tenant, service, monkeypatch
+    ):
+        from rag import enhanced_rag_v2
+
+        add_work_documents(db_session, tenant)
+        result = service.rebuild_embedding_index(tenant.id)
+
+        index = load_embedding_index(result["index_path"])
+        assert index["embeddings"].dtype == np.float16
+        assert index["metadata"]["normalized"] is True
+        np.testing.assert_allclose(
+            np.linalg.norm(index["embeddings"].astype(np.float32), axis=1), 1.0, atol=1e-2
+        )
+
+        monkeypatch.setattr(enhanced_rag_v2, "AZURE_OPENAI_API_KEY", "test-key")
+        rag = enhanced_rag_v2.EnhancedRAGv2(
+            result["index_path"], use_reranker=False, cache_results=False
+        )
+        target = index["chunks"][-1]["content"]
+        monkeypatch.setattr(
+            rag, "_get_query_embedding", lambda query: FakeEmbeddingClient.vector_for(target)
+        )
+
+        results = rag._hybrid_search("design note", "design note", {"bm25_weight": 0.0}, top_k=3)
+
+        assert results[0]["content"] == target
@@ -0,0 +1,23 @@
+"""
+Token counting for LLM prompt budgets.
+Counts GPT-4o tokens with tiktoken when it (and its BPE files) can be
+loaded, and falls back to the 1 token ≈ 4 chars estimate otherwise.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    _TOKENIZER = tiktoken.encoding_for_model("gpt-4o")
+except Exception as e:
+    _TOKENIZER = None
+    logger.warning(f"tiktoken unavailable, estimating tokens from chars: {e}")
+
+
+def count_tokens(text: str) -> int:
+    """Count GPT-4o tokens in text (estimated if tiktoken is unavailable)"""
+    if _TOKENIZER is None:
+        return len(text) // 4
+    return len(_TOKENIZER.encode(text, disallowed_special=()))